@@ -0,0 +1,244 @@
+"""TodoManager 性能基准：生成合成数据，测量各热点操作的延迟分位数、吞吐量和峰值内存
+
+用法:
+    python bench_todo.py                                 # 默认 1k 和 100k 任务
+    python bench_todo.py --sizes 1000,100000,1000000 --output bench.json
+    python bench_todo.py --compare old.json              # 与之前的结果对比，p50变慢超过阈值时退出码为1
+
+数据写在临时目录中（通过替换 TODO_FILE），不会触碰 ~/.todo.json。
+每个规模在独立的子进程中运行，峰值内存（RSS）互不干扰。
+"""
+import io
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import tempfile
+import subprocess
+import importlib.util
+from pathlib import Path
+from contextlib import redirect_stdout
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+TODO_SCRIPT = Path(__file__).with_name("todo_0.5.3.py")
+DEFAULT_SIZES = [1000, 100000]
+DEFAULT_SAMPLES = 200  # 每个微操作的采样次数
+REGRESSION_THRESHOLD = 0.2  # --compare 时p50变慢超过20%视为退化
+
+# 合成数据用的中文词表：动词 + 对象 + 可选的补充说明，搜索关键词从中选取
+VERBS = ["整理", "提交", "审核", "准备", "更新", "跟进", "预约", "修复", "讨论", "购买", "回复", "确认"]
+OBJECTS = ["季度报告", "周会纪要", "项目预算", "客户合同", "测试用例", "发布说明", "年度计划", "报销单",
+           "设计文档", "招聘需求", "服务器配置", "培训材料", "牛奶和面包", "体检预约", "会议室"]
+DETAILS = ["", "", "（紧急）", " - 与市场部", "，周五前", " v2", " #工作", " #家庭", "，需要老板签字", " Q3"]
+SEARCH_TERMS = ["报告", "项目预算", "周会", "合同", "服务器", "紧急", "牛奶", "不存在的词", "Q3", "发布"]
+DUE_INPUTS = ["2026-11-01 18:00", "2026-11-01", "11/05", "11-05", "2026/11/05", "20261105",
+              "today", "tomorrow", "3days", "none"]
+
+
+def load_todo(path=TODO_SCRIPT):
+    """按文件路径导入 todo_0.5.3.py（文件名含点，不能直接import）"""
+    spec = importlib.util.spec_from_file_location("todo", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def generate_tasks(todo, size, seed):
+    """生成size个任务：约30%已完成，待办中40%无截止日期、20%已过期、40%未来到期"""
+    rng = random.Random(seed)
+    now = todo.now_minutes()
+    tasks = []
+    for i in range(1, size + 1):
+        content = rng.choice(VERBS) + rng.choice(OBJECTS) + rng.choice(DETAILS)
+        created = now - rng.randrange(90 * 1440)
+        status = "done" if rng.random() < 0.3 else "pending"
+        modified = created + rng.randrange(now - created + 1) if status == "done" else created
+        roll = rng.random()
+        if roll < 0.4:
+            due = None
+        elif roll < 0.6:
+            due = now - rng.randrange(1, 30 * 1440)
+        else:
+            due = now + rng.randrange(1, 60 * 1440)
+        tasks.append(todo.Task(i, content, rng.choice(todo.VALID_PRIS), status, created, modified, due))
+    return tasks
+
+
+def summarize(samples, total=None):
+    """延迟样本（秒）-> 分位数（毫秒）和吞吐量（次/秒）"""
+    samples = sorted(samples)
+    n = len(samples)
+    pick = lambda q: samples[min(n - 1, int(q * n))] * 1000
+    total = sum(samples) if total is None else total
+    return {
+        "samples": n,
+        "mean_ms": round(total / n * 1000, 4),
+        "p50_ms": round(pick(0.5), 4),
+        "p90_ms": round(pick(0.9), 4),
+        "p99_ms": round(pick(0.99), 4),
+        "max_ms": round(samples[-1] * 1000, 4),
+        "ops_per_sec": round(n / total, 1) if total else None,
+    }
+
+
+def measure(func, args_list):
+    """依次以args_list中的参数调用func，逐次计时"""
+    samples = []
+    for args in args_list:
+        start = time.perf_counter()
+        func(*args)
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+def peak_rss_kb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak  # macOS单位为字节，Linux为KB
+
+
+def run_size(size, backend, samples, seed, trace_memory):
+    """在临时目录中针对一个数据规模运行全部操作，返回结果字典"""
+    todo = load_todo()
+    todo.STORAGE_BACKEND = backend
+    todo.COLOR_ENABLED = False
+    rng = random.Random(seed)
+    heavy = max(3, samples // 20) if size < 1000000 else 3  # 整体加载/保存等重操作的次数
+
+    with tempfile.TemporaryDirectory(prefix="todo_bench_") as tmp:
+        todo.TODO_FILE = Path(tmp) / ".todo.json"
+        tasks = generate_tasks(todo, size, seed)
+        todo.create_storage().commit([("put", t, None) for t in tasks], tasks)
+        del tasks
+        ops = {}
+
+        # 加载：首次需要建立搜索索引，之后复用持久化的索引
+        ops["load_cold"] = measure(todo.TodoManager, [()])
+        ops["load"] = measure(todo.TodoManager, [()] * heavy)
+        if trace_memory:
+            import tracemalloc
+            tracemalloc.start()
+            todo.TodoManager()
+            ops["load"]["alloc_peak_kb"] = tracemalloc.get_traced_memory()[1] // 1024
+            tracemalloc.stop()
+
+        manager = todo.TodoManager()
+        ids = [rng.randint(1, size) for _ in range(samples)]
+        ops["find"] = measure(manager._find, [(i,) for i in ids])
+        ops["search"] = measure(manager.search, [(rng.choice(SEARCH_TERMS),) for _ in range(samples)])
+        ops["search_all"] = measure(manager.search, [("报告 紧急", "all")] * heavy)
+        ops["get_stats"] = measure(manager.get_stats, [()] * samples)
+        ops["overdue_count"] = measure(manager.overdue_count, [()] * samples)
+
+        # list输出到内存缓冲区，只计排序和格式化
+        def run_list(*args):
+            with redirect_stdout(io.StringIO()):
+                todo.list_cmd(manager, list(args))
+        ops["list_sort"] = measure(run_list, [()] * heavy)
+        ops["list_sort_due"] = measure(run_list, [("--due",)] * heavy)
+        ops["list_page"] = measure(run_list, [("--limit", "20")] * samples)
+
+        ops["parse_due_date"] = measure(todo.parse_due_date, [(rng.choice(DUE_INPUTS),) for _ in range(samples * 10)])
+
+        # 保存：每次修改都经过_save（日志追加/单行写入），最后测一次完整快照重写
+        ops["add"] = measure(manager.add, [(f"基准测试任务{i}", "normal", "tomorrow") for i in range(samples)])
+        ops["done"] = measure(manager.done, [(i,) for i in rng.sample(
+            [t.id for t in manager.tasks if t.status == "pending"], samples)])
+        # 批量模式：整批只保存一次，这里给出均摊到每次修改的耗时
+        start = time.perf_counter()
+        with manager.batch():
+            for i in range(samples):
+                manager.add(f"批量任务{i}")
+        ops["add_batch"] = summarize([(time.perf_counter() - start) / samples] * samples)
+        if backend == "json":
+            ops["compact"] = measure(manager.storage.compact, [(list(manager.tasks),)] * heavy)
+
+    return {"size": size, "peak_rss_kb": peak_rss_kb(), "ops": ops}
+
+
+def run_all(sizes, backend, samples, seed, trace_memory):
+    """每个规模在子进程中运行，避免前一个规模的内存峰值影响后一个"""
+    results = {}
+    for size in sizes:
+        print(f"运行 {size} 个任务 ...", file=sys.stderr)
+        cmd = [sys.executable, __file__, "--worker", str(size), "--backend", backend,
+               "--samples", str(samples), "--seed", str(seed)]
+        if trace_memory:
+            cmd.append("--trace-memory")
+        out = subprocess.run(cmd, check=True, stdout=subprocess.PIPE).stdout
+        results[str(size)] = json.loads(out)
+    return {
+        "script": TODO_SCRIPT.name,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "backend": backend,
+        "samples": samples,
+        "seed": seed,
+        "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "results": results,
+    }
+
+
+def compare(old, new, threshold):
+    """对比两次结果中相同规模、相同操作的p50，返回退化的条目"""
+    regressions = []
+    for size, result in new["results"].items():
+        old_ops = old.get("results", {}).get(size, {}).get("ops", {})
+        for name, stats in result["ops"].items():
+            before = old_ops.get(name, {}).get("p50_ms")
+            after = stats["p50_ms"]
+            if not before:
+                continue
+            change = (after - before) / before
+            flag = "退化" if change > threshold else "改进" if change < -threshold else ""
+            print(f"{size:>8} {name:<16} {before:>10.4f} -> {after:>10.4f} ms  {change:+7.1%} {flag}",
+                  file=sys.stderr)
+            if change > threshold:
+                regressions.append((size, name, change))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="TodoManager 性能基准")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)), help="任务数，逗号分隔")
+    parser.add_argument("--backend", choices=["json", "sqlite"], default="json", help="存储后端")
+    parser.add_argument("--samples", type=int, default=DEFAULT_SAMPLES, help="每个微操作的采样次数")
+    parser.add_argument("--seed", type=int, default=42, help="随机种子（相同种子生成相同数据）")
+    parser.add_argument("--trace-memory", action="store_true", help="额外用tracemalloc测量加载时的分配峰值")
+    parser.add_argument("--output", help="结果JSON文件（默认输出到标准输出）")
+    parser.add_argument("--compare", help="之前的结果JSON，对比p50并在退化时以退出码1结束")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD, help="退化阈值（比例）")
+    parser.add_argument("--worker", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        json.dump(run_size(args.worker, args.backend, args.samples, args.seed, args.trace_memory), sys.stdout)
+        return 0
+
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    report = run_all(sizes, args.backend, args.samples, args.seed, args.trace_memory)
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            old = json.load(f)
+        regressions = compare(old, report, args.threshold)
+        if regressions:
+            print(f"共 {len(regressions)} 项操作变慢超过 {args.threshold:.0%}", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
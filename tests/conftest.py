@@ -0,0 +1,26 @@
+import importlib.util
+from pathlib import Path
+
+import pytest
+
+TODO_SCRIPT = Path(__file__).resolve().parent.parent / "todo_0.5.3.py"
+
+
+def load_todo():
+    # 文件名含点，不能直接import
+    spec = importlib.util.spec_from_file_location("todo", TODO_SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture
+def todo(tmp_path, monkeypatch):
+    """每个测试重新导入一份模块，数据文件都放在临时的HOME目录下"""
+    monkeypatch.setenv("HOME", str(tmp_path))
+    monkeypatch.setenv("USERPROFILE", str(tmp_path))
+    for name in ("TODO_BACKEND", "TODO_FORMAT", "TODO_PROFILE", "TODO_REMIND_HOOK"):
+        monkeypatch.delenv(name, raising=False)
+    module = load_todo()
+    module.COLOR_ENABLED = False
+    return module
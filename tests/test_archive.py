@@ -0,0 +1,32 @@
+import json
+from datetime import date, timedelta
+
+
+def record(task_id, content, status, day):
+    stamp = f"{day} 09:00"
+    return {"id": task_id, "content": content, "priority": "normal", "status": status,
+            "created": stamp, "modified": stamp, "due_date": None}
+
+
+def test_archive_moves_old_done_tasks_and_keeps_stats(todo):
+    today = date.today()
+    old = today - timedelta(days=60)
+    records = [record(1, "旧报告", "done", old), record(2, "待办", "pending", old),
+               record(3, "新完成", "done", today), record(4, "旧周报", "done", old)]
+    todo.TODO_FILE.write_text(json.dumps(records, ensure_ascii=False), encoding="utf-8")
+    manager = todo.TodoManager()
+    before = manager.get_stats()
+
+    assert manager.archive_done(30) == 2
+    assert [t.id for t in manager.tasks] == [2, 3]
+    assert manager.archive_done(30) == 0  # 不会重复归档
+
+    stats = manager.get_stats()
+    assert stats["archived"] == 2
+    assert {k: stats[k] for k in ("total", "done", "pending", "priority")} == \
+        {k: before[k] for k in ("total", "done", "pending", "priority")}
+    assert todo.TodoManager().get_stats() == stats
+
+    assert [t.id for t in manager.search("报告", include_archive=True)] == [1]
+    assert manager.search("报告") == []
+    assert todo.TodoManager().add("新任务") == 5  # 归档任务的ID不复用
@@ -0,0 +1,12 @@
+def test_restore_numbers_include_other_processes_backups(todo, capsys):
+    first = todo.TodoManager()
+    first.add("a")  # 第一份备份，first缓存了清单
+    second = todo.TodoManager()
+    second.add("b")
+    second._backup(force=True)  # 另一个进程写的更新的备份
+
+    assert todo.restore_cmd(first, [])
+    assert "2." in capsys.readouterr().out
+    first.remove(1)
+    first.restore(1)  # 1号是最新的备份，即second写的那份
+    assert [t.content for t in first.tasks] == ["a", "b"]
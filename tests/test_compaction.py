@@ -0,0 +1,169 @@
+import json
+
+import pytest
+
+
+def contents(manager):
+    return [(t.id, t.content, t.status) for t in manager.tasks]
+
+
+@pytest.mark.parametrize("fmt", ["compact", "pretty", "binary"])
+def test_compaction_round_trip(todo, fmt):
+    todo.SNAPSHOT_FORMAT = fmt
+    todo.JOURNAL_COMPACT_THRESHOLD = 3
+    manager = todo.TodoManager()
+    for content in ("one", "two", "three"):
+        manager.add(content)
+    assert not manager.storage.journal.exists()
+    assert todo.snapshot_format(todo.TODO_FILE) == fmt
+    manager.done(2)
+
+    loaded = todo.TodoManager()
+    assert contents(loaded) == [(1, "one", "pending"), (2, "two", "done"), (3, "three", "pending")]
+    if fmt != "binary":
+        # JSON快照仍是旧版本能直接读取的任务数组
+        assert [r["id"] for r in json.loads(todo.TODO_FILE.read_text(encoding="utf-8"))] == [1, 2, 3]
+
+
+def test_legacy_array_snapshot_with_journal(todo):
+    record = {"id": 1, "content": "old", "priority": "normal", "status": "pending",
+              "created": "2026-01-01 09:00", "modified": "2026-01-01 09:00", "due_date": None}
+    todo.TODO_FILE.write_text(json.dumps([record], indent=2), encoding="utf-8")
+    journal = todo.TODO_FILE.with_name(".todo.json.journal")
+    journal.write_text(json.dumps({"op": "del", "id": 1}) + "\n", encoding="utf-8")
+    assert contents(todo.TodoManager()) == []
+
+    journal.unlink()
+    manager = todo.TodoManager()
+    assert contents(manager) == [(1, "old", "pending")]
+    manager.add("new")
+    assert contents(todo.TodoManager()) == [(1, "old", "pending"), (2, "new", "pending")]
+
+
+def test_stale_journal_after_interrupted_compaction(todo):
+    todo.JOURNAL_COMPACT_THRESHOLD = 2
+    manager = todo.TodoManager()
+    manager.add("one")
+    journal = manager.storage.journal
+    stale = journal.read_bytes()
+    manager.done(1)  # 触发压缩
+    assert not journal.exists()
+    journal.write_bytes(stale)  # 模拟替换快照后、删除日志前中断
+
+    loaded = todo.TodoManager()
+    assert contents(loaded) == [(1, "one", "done")]
+    loaded.add("two")  # 过期的日志不能接着追加
+    assert contents(todo.TodoManager()) == [(1, "one", "done"), (2, "two", "pending")]
+
+
+def test_stale_clear_does_not_wipe_compacted_batch(todo):
+    todo.JOURNAL_COMPACT_THRESHOLD = 4
+    manager = todo.TodoManager()
+    manager.add("old")
+    manager.clear()
+    journal = manager.storage.journal
+    stale = journal.read_bytes()
+    with manager.batch():
+        manager.add("a")
+        manager.add("b")
+    assert not journal.exists()
+    journal.write_bytes(stale)
+
+    assert [t.content for t in todo.TodoManager().tasks] == ["a", "b"]
+
+
+def test_concurrent_writers_merge(todo):
+    first = todo.TodoManager()
+    second = todo.TodoManager()
+    assert first.add("from first") == 1
+    assert second.add("from second") == 2  # 加锁后先合并first的修改，ID不冲突
+    first.done(2)
+    second.refresh()
+    assert contents(second) == [(1, "from first", "pending"), (2, "from second", "done")]
+    assert contents(todo.TodoManager()) == contents(second)
+
+
+def test_writer_reloads_after_other_process_compacts(todo):
+    todo.JOURNAL_COMPACT_THRESHOLD = 3
+    first = todo.TodoManager()
+    second = todo.TodoManager()
+    first.add("a")
+    first.add("b")
+    first.add("c")  # first压缩，second的日志偏移已失效
+    assert not first.storage.journal.exists()
+    second.add("d")
+    second.remove(1)
+    first.refresh()
+    expected = [(2, "b", "pending"), (3, "c", "pending"), (4, "d", "pending")]
+    assert contents(first) == expected
+    assert contents(todo.TodoManager()) == expected
+
+
+def test_damaged_binary_snapshot_keeps_earlier_tasks(todo):
+    todo.SNAPSHOT_FORMAT = "binary"
+    todo.JOURNAL_COMPACT_THRESHOLD = 3
+    manager = todo.TodoManager()
+    for content in ("一", "二", "三"):
+        manager.add(content)
+    data = todo.TODO_FILE.read_bytes()
+    todo.TODO_FILE.write_bytes(data[:-2])
+
+    loaded = todo.TodoManager()
+    assert [t.content for t in loaded.tasks] == ["一", "二"]
+    assert todo.TODO_FILE.with_name(".todo.json.corrupt").exists()
+
+
+def test_truncated_json_snapshot_keeps_earlier_tasks(todo):
+    todo.JOURNAL_COMPACT_THRESHOLD = 3
+    manager = todo.TodoManager()
+    for content in ("一", "二", "三"):
+        manager.add(content)
+    data = todo.TODO_FILE.read_bytes()
+    todo.TODO_FILE.write_bytes(data[:-10])  # 整体解析失败，改用流式读取
+
+    loaded = todo.TodoManager()
+    assert [t.content for t in loaded.tasks] == ["一", "二"]
+    assert todo.TODO_FILE.with_name(".todo.json.corrupt").exists()
+
+
+@pytest.mark.parametrize("later", [[], ["d"]])
+def test_reload_racing_another_compaction(todo, later, capsys):
+    todo.JOURNAL_COMPACT_THRESHOLD = 3
+    writer = todo.TodoManager()
+    writer.add("a")
+    writer.add("b")
+    reader = todo.TodoManager()
+    load_snapshot = reader.storage.load_snapshot
+
+    def racing():
+        # 读完快照后、读日志之前，另一个进程压缩（快照替换、日志删除），之后可能又开始了新日志
+        data = load_snapshot()
+        reader.storage.load_snapshot = load_snapshot
+        writer.add("c")
+        for content in later:
+            writer.add(content)
+        return data
+    reader.storage.load_snapshot = racing
+    reader.reload()
+
+    assert [t.content for t in reader.tasks] == ["a", "b", "c"] + later
+    assert "日志早于当前快照" not in capsys.readouterr().out
+    assert not reader.storage.needs_compact
+
+
+def test_failed_load_never_overwrites_store(todo, monkeypatch):
+    todo.JOURNAL_COMPACT_THRESHOLD = 1
+    todo.TodoManager().add("one")
+
+    def broken(*args):
+        raise OSError("busy")
+    monkeypatch.setattr(todo.SearchIndex, "load_or_build", broken)
+    manager = todo.TodoManager()
+    assert list(manager.tasks) == []
+    with pytest.raises(IOError):
+        manager.add("two")  # 仍无法加载：拒绝保存，而不是用空表压缩
+
+    monkeypatch.undo()
+    manager.refresh()  # 加载失败后的下一次同步重新加载
+    assert contents(manager) == [(1, "one", "pending")]
+    assert contents(todo.TodoManager()) == [(1, "one", "pending")]
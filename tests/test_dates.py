@@ -0,0 +1,26 @@
+import pytest
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("2026-11-01 18:00", "2026-11-01 18:00"),
+    ("2026-11-01  18:00", "2026-11-01 18:00"),
+    ("2026-1-5 9:5", "2026-01-05 09:05"),
+    ("2026-11-01", "2026-11-01 23:59"),
+    ("2026/11/05", "2026-11-05 23:59"),
+    ("20261105", "2026-11-05 23:59"),
+    ("2026115", "2026-11-05 23:59"),
+    ("none", None),
+])
+def test_parse_due_date(todo, text, expected):
+    assert todo.parse_due_date(text) == expected
+
+
+def test_parse_relative_days(todo):
+    assert todo.parse_due_date("+3days") == todo.parse_due_date("3days") == todo.parse_due_date("3d")
+    assert todo.parse_due_date("2weeks") == todo.parse_due_date("14days")
+
+
+@pytest.mark.parametrize("text", ["2026-11-01 ", " 2026-11-01", "2026-11-01 24:00", "2026-02-30", "2026-11-01\n", "soon"])
+def test_parse_due_date_rejects(todo, text):
+    with pytest.raises(ValueError):
+        todo.parse_due_date(text)
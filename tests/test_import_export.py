@@ -0,0 +1,39 @@
+import json
+from datetime import date, timedelta
+
+import pytest
+
+
+def fields(manager):
+    return [(t.content, t.priority, t.status, t.due_date) for t in manager.tasks]
+
+
+@pytest.mark.parametrize("name", ["tasks.ndjson", "tasks.csv"])
+def test_export_import_round_trip(todo, tmp_path, name):
+    manager = todo.TodoManager()
+    manager.add("写周报", "high", "2026-11-01 18:00")
+    manager.add("买牛奶, 鸡蛋", "low")  # CSV需要转义的逗号
+    manager.add('引号"测试"')
+    manager.done(3)
+    expected = fields(manager)
+
+    path = tmp_path / name
+    assert todo.export_cmd(manager, [str(path)])
+    manager.clear()
+    assert todo.import_cmd(manager, [str(path)])
+    assert fields(manager) == expected
+    assert fields(todo.TodoManager()) == expected
+
+
+def test_export_due_range_covers_whole_days(todo, tmp_path, capsys):
+    today = date.today()
+    manager = todo.TodoManager()
+    for day, clock in ((today - timedelta(days=1), "23:30"), (today, "00:10"), (today, "23:50"),
+                       (today + timedelta(days=1), "00:05")):
+        manager.add(f"{day} {clock}", due_date=f"{day} {clock}")
+
+    for since in ("today", today.strftime("%Y/%m/%d"), str(today)):
+        path = tmp_path / "out.ndjson"
+        assert todo.export_cmd(manager, [str(path), "--due-from", since, "--due-to", since])
+        records = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+        assert [r["content"] for r in records] == [f"{today} 00:10", f"{today} 23:50"], since
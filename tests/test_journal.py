@@ -0,0 +1,88 @@
+import json
+
+
+def test_journal_replay(todo):
+    manager = todo.TodoManager()
+    first = manager.add("one")
+    second = manager.add("two", "high")
+    manager.done(first)
+    manager.edit(second, "two!")
+    third = manager.add("three")
+    manager.remove(third)
+    assert todo.TODO_FILE.with_name(".todo.json.journal").exists()
+
+    loaded = todo.TodoManager()
+    assert [(t.id, t.content, t.priority, t.status) for t in loaded.tasks] == [
+        (first, "one", "normal", "done"),
+        (second, "two!", "high", "pending"),
+    ]
+
+
+def test_journal_replay_after_clear(todo):
+    manager = todo.TodoManager()
+    manager.add("old")
+    manager.clear()
+    task_id = manager.add("new")
+
+    loaded = todo.TodoManager()
+    assert [t.id for t in loaded.tasks] == [task_id]
+
+
+def test_torn_tail_is_truncated_before_append(todo):
+    manager = todo.TodoManager()
+    manager.add("one")
+    manager.add("two")
+    journal = manager.storage.journal
+    with open(journal, "ab") as f:
+        f.write(b'{"op": "put", "task": {"id": 3, "cont')
+
+    manager = todo.TodoManager()
+    assert [t.content for t in manager.tasks] == ["one", "two"]
+    task_id = manager.add("three")
+    assert task_id == 3
+    assert journal.read_bytes().endswith(b"\n")
+
+    loaded = todo.TodoManager()
+    assert [(t.id, t.content) for t in loaded.tasks] == [(1, "one"), (2, "two"), (3, "three")]
+    assert loaded.add("four") == 4
+
+
+def test_torn_tail_written_by_another_process(todo):
+    writer = todo.TodoManager()
+    reader = todo.TodoManager()
+    writer.add("one")
+    with open(writer.storage.journal, "ab") as f:
+        f.write(b'{"op": "del"')
+
+    reader.add("two")
+    loaded = todo.TodoManager()
+    assert [t.content for t in loaded.tasks] == ["one", "two"]
+
+
+def test_invalid_record_is_skipped(todo):
+    records = [
+        {"id": 1, "content": 123, "priority": "normal", "status": "pending",
+         "created": "2026-01-01 09:00", "modified": "2026-01-01 09:00"},
+        {"id": 2, "content": "ok", "priority": "normal", "status": "pending",
+         "created": "2026-01-01 09:00", "modified": "2026-01-01 09:00"},
+    ]
+    todo.TODO_FILE.write_text(json.dumps(records), encoding="utf-8")
+
+    manager = todo.TodoManager()
+    assert [(t.id, t.content) for t in manager.tasks] == [(2, "ok")]
+    assert manager.search("ok")[0].id == 2
+    assert todo.TODO_FILE.with_name(".todo.json.corrupt").exists()
+
+
+def test_unexpected_load_error_leaves_empty_manager(todo, monkeypatch, capsys):
+    todo.TodoManager().add("one")
+
+    def broken(*args):
+        raise RuntimeError("boom")
+    monkeypatch.setattr(todo.SearchIndex, "load_or_build", broken)
+
+    for background in (False, True):
+        manager = todo.TodoManager(background=background)
+        assert list(manager.tasks) == []
+        assert manager.get_stats()["total"] == 0
+    assert "RuntimeError: boom" in capsys.readouterr().out
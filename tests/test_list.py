@@ -0,0 +1,26 @@
+import pytest
+
+
+def test_pages_match_full_sort(todo, capsys):
+    manager = todo.TodoManager()
+    with manager.batch():
+        for i, pri in enumerate(["low", "high", "normal", "high", "low", "normal", "high"], 1):
+            manager.add(f"任务{i}", pri, due_date=f"2026-12-{10 - i:02d}" if i % 2 else None)
+        manager.done(2)
+
+    for by_due in (False, True):
+        full, total = manager.list_tasks(by_due)
+        pages = [manager.list_tasks(by_due, limit=3, page=p) for p in (1, 2, 3)]
+        assert [t.id for tasks, _ in pages for t in tasks] == [t.id for t in full]
+        assert {n for _, n in pages} == {total} == {7}
+
+    with pytest.raises(ValueError):
+        manager.list_tasks(limit=3, page=4)
+    with pytest.raises(ValueError):
+        manager.list_tasks(limit=0)
+
+    capsys.readouterr()
+    assert todo.list_cmd(manager, ["--limit", "2", "--page", "2", "pri:high"])
+    assert "第 2/2 页，共 3 个任务" in capsys.readouterr().out
+    assert not todo.list_cmd(manager, ["--limit", "3", "--page", "2", "pri:high"])
+    assert "页码超出范围" in capsys.readouterr().out
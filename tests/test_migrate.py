@@ -0,0 +1,26 @@
+def test_migrate_keeps_backups_restorable(todo, tmp_path):
+    other = tmp_path / "other" / "tasks.json"
+    source = todo.TodoManager(todo.JsonStorage(other))
+    source.backups = todo.BackupStore(other.parent / "todo_backups")
+    source.add("one")
+    source.add("two")
+    source._backup(force=True)
+
+    count, backups = todo.migrate_to_sqlite(other)
+    assert (count, backups) == (2, len(source.backups.snapshots))
+    assert todo.migrate_to_sqlite(other)[1] == 0  # 已合并的备份不重复导入
+
+    todo.STORAGE_BACKEND = "sqlite"
+    manager = todo.TodoManager()
+    assert [t.content for t in manager.tasks] == ["one", "two"]
+    manager.remove(1)
+    manager.restore(1)
+    assert [t.content for t in manager.tasks] == ["one", "two"]
+
+
+def test_migrate_missing_source_is_an_error(todo, tmp_path, capsys):
+    missing = tmp_path / "typo.json"
+    manager = todo.TodoManager()
+    assert not todo.migrate_cmd(manager, [str(missing)])
+    assert "找不到JSON数据" in capsys.readouterr().out
+    assert not todo.db_file().exists()
@@ -0,0 +1,41 @@
+def test_bulk_remove_requires_explicit_fields(todo, capsys):
+    manager = todo.TodoManager()
+    for content in ("周会报告", "季度报告", "买牛奶"):
+        manager.add(content)
+
+    assert not todo.remove_cmd(manager, ["报告"])
+    assert not todo.remove_cmd(manager, ["1O"])
+    assert not todo.done_cmd(manager, ["-牛奶"])
+    assert "需要写明字段" in capsys.readouterr().out
+    assert len(manager.tasks) == 3
+
+    assert todo.remove_cmd(manager, ["text:报告"])
+    assert todo.done_cmd(manager, ["status:pending"])
+    assert [(t.content, t.status) for t in manager.tasks] == [("买牛奶", "done")]
+
+
+def test_open_ended_id_ranges(todo):
+    manager = todo.TodoManager()
+    for content in ("一", "二", "三"):
+        manager.add(content)
+
+    for query in ("id>=0", "id>-1", "id>=1", "id<=99999999999999999999", "id:0-3"):
+        assert [t.id for t in manager.select(query)] == [1, 2, 3], query
+    assert [t.id for t in manager.select("id>1")] == [2, 3]
+    assert manager.select("id<=0") == []
+    assert manager.get_stats("id>=0")["total"] == 3
+
+
+def test_list_rejects_unknown_options(todo, capsys):
+    manager = todo.TodoManager()
+    for content in ("周会报告", "买牛奶"):
+        manager.add(content)
+    capsys.readouterr()
+
+    assert not todo.list_cmd(manager, ["--lmit", "5"])
+    assert not todo.list_cmd(manager, ["-牛奶"])
+    assert "未知参数" in capsys.readouterr().out
+
+    assert todo.list_cmd(manager, ["-text:牛奶"])
+    out = capsys.readouterr().out
+    assert "周会报告" in out and "买牛奶" not in out
@@ -0,0 +1,26 @@
+def test_heap_skips_stale_entries(todo):
+    manager = todo.TodoManager()
+    a = manager.add("a", due_date="3h")
+    b = manager.add("b", due_date="1h")
+    c = manager.add("c", due_date="2h")
+    due = {t.id: t.due_date for t in manager.tasks}
+    assert manager.next_reminder() == due[b] - todo.REMIND_AHEAD
+
+    manager.edit(b, new_due="5h")  # 旧的提醒条目失效
+    manager.done(c)
+    due[b] = manager._find(b).due_date
+    assert todo.TodoManager().next_reminder() == manager.next_reminder() == due[a] - todo.REMIND_AHEAD
+
+    queue = manager._reminders
+    assert queue.pop_ready(due[a]) == [("soon", a), ("due", a)]
+    assert queue.pop_ready(due[a]) == []
+    assert queue.pop_ready(due[b]) == [("soon", b), ("due", b)]
+    assert manager.next_reminder() is None
+
+
+def test_due_reminders_returns_tasks(todo, monkeypatch):
+    manager = todo.TodoManager()
+    task_id = manager.add("会议", due_date="1h")
+    due = manager._find(task_id).due_date
+    monkeypatch.setattr(todo, "now_minutes", lambda: due)
+    assert [(kind, t.content) for kind, t in manager.due_reminders()] == [("soon", "会议"), ("due", "会议")]
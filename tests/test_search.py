@@ -0,0 +1,30 @@
+def ids(tasks):
+    return [t.id for t in tasks]
+
+
+def test_index_follows_edits_and_persists(todo):
+    todo.JOURNAL_COMPACT_THRESHOLD = 5
+    manager = todo.TodoManager()
+    for content in ("写周报", "周会", "写报告", "买菜"):
+        manager.add(content)
+    manager.edit(2, new_content="周报评审")
+    manager.remove(1)  # 第5次修改，压缩并保存索引
+    assert todo.index_file().exists()
+    assert ids(manager.search("周报")) == [2]
+
+    loaded = todo.TodoManager()  # 从索引文件加载
+    assert loaded._search.postings == manager._search.postings
+    assert ids(loaded.search("报")) == [2, 3]
+    loaded.add("周报汇总")
+    assert ids(loaded.search("周报")) == [2, 5]
+
+
+def test_damaged_index_file_is_rebuilt(todo):
+    todo.JOURNAL_COMPACT_THRESHOLD = 2
+    manager = todo.TodoManager()
+    manager.add("写周报")
+    manager.add("写报告")
+    data = todo.index_file().read_bytes()
+    todo.index_file().write_bytes(data[:-3])
+
+    assert ids(todo.TodoManager().search("报")) == [1, 2]
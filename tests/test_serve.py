@@ -0,0 +1,61 @@
+import asyncio
+import json
+
+
+def http(method, path, body=None, headers=None):
+    data = json.dumps(body).encode("utf-8") if body is not None else b""
+    lines = [f"{method} {path} HTTP/1.1", "Connection: close"]
+    headers = {"Content-Length": str(len(data)), **(headers or {})}
+    lines += [f"{k}: {v}" for k, v in headers.items()]
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("utf-8") + data
+
+
+async def send(port, raw):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(raw)
+    await writer.drain()
+    data = await reader.read()
+    writer.close()
+    head, _, body = data.partition(b"\r\n\r\n")
+    return int(head.split()[1]), json.loads(body)
+
+
+def serve(todo, manager, *raws, flush_delay=0.05):
+    """启动服务，并发发出请求，返回各请求的 (状态码, JSON)"""
+    async def run():
+        server = await asyncio.start_server(todo.TodoServer(manager, flush_delay)._handle, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            return await asyncio.gather(*(send(port, raw) for raw in raws))
+    return asyncio.run(run())
+
+
+def test_concurrent_writes_share_one_save(todo):
+    manager = todo.TodoManager()
+    commits = []
+    commit = manager.storage.commit
+    manager.storage.commit = lambda ops, tasks: commits.append(len(ops)) or commit(ops, tasks)
+
+    results = serve(todo, manager, *(http("POST", "/tasks", {"content": f"任务{i}"}) for i in range(5)))
+    assert sorted(body["id"] for status, body in results) == [1, 2, 3, 4, 5]
+    assert {status for status, body in results} == {201}
+    assert commits == [5]
+    assert len(todo.TodoManager().tasks) == 5
+
+
+def test_error_status_codes(todo):
+    manager = todo.TodoManager()
+    manager.add("one")
+    results = serve(
+        todo, manager,
+        http("POST", "/tasks", {"content": 123}),
+        http("PATCH", "/tasks/1", {"priority": ["high"]}),
+        http("POST", "/tasks", {"content": "x"}, {"Content-Length": "abc"}),
+        http("POST", "/tasks", {"content": "x"}, {"Content-Length": "-1"}),
+        http("POST", "/tasks", {"content": "x"}, {"Content-Length": str(todo.SERVE_MAX_BODY + 1)}),
+        http("GET", "/tasks/99"),
+        http("GET", "/nowhere"),
+        http("GET", "/tasks?limit=x"),
+    )
+    assert [status for status, body in results] == [400, 400, 400, 400, 413, 404, 404, 400]
+    assert [t.content for t in manager.tasks] == ["one"]
@@ -0,0 +1,11 @@
+def test_background_load_then_use_from_main_thread(todo):
+    todo.STORAGE_BACKEND = "sqlite"
+    todo.TodoManager().add("one")
+
+    manager = todo.TodoManager(background=True)  # 连接在加载线程中创建
+    manager.refresh()
+    manager.add("two")
+    other = todo.TodoManager()
+    other.done(1)
+    manager.refresh()
+    assert [(t.content, t.status) for t in manager.tasks] == [("one", "done"), ("two", "pending")]
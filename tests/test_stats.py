@@ -0,0 +1,14 @@
+def test_bulk_build_matches_incremental(todo):
+    manager = todo.TodoManager()
+    with manager.batch():
+        for i in range(30):
+            manager.add(f"task {i}", due_date=f"2026-{i % 12 + 1:02d}-{i % 28 + 1:02d}" if i % 3 else None)
+        for i in range(1, 30, 4):
+            manager.done(i)
+
+    built = todo.TaskStats()
+    built.build(manager.tasks)
+    incremental = manager._stats
+    assert built.pending_due == incremental.pending_due == sorted(incremental.pending_due)
+    assert (built.total, built.done, built.priority) == (incremental.total, incremental.done, incremental.priority)
+    assert todo.TodoManager().get_stats() == manager.get_stats()
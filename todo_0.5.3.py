@@ -1,11 +1,46 @@
+import io
 import os
 import sys
+import csv
+import gzip
 import json
+import zlib
+import time
+import hashlib
+import re
+import heapq
+import struct
 import argparse
+import sqlite3
+import subprocess
+import asyncio
+import threading
+from array import array
 from pathlib import Path
-from datetime import datetime, timedelta
-from functools import wraps
+from datetime import date, datetime
+from bisect import bisect_left, bisect_right, insort
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from functools import lru_cache, wraps
+from itertools import islice
 from shutil import copyfile
+from urllib.parse import parse_qs, urlsplit
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# 可选加速：安装了orjson/msgpack时用于编码快照和索引，未安装时使用标准库
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
 
 # 配置常量（新增截止日期格式说明）
 TODO_FILE = Path.home() / ".todo.json"
@@ -13,8 +48,39 @@ COLOR_ENABLED = sys.stdout.isatty()
 DATE_FORMAT = "%Y-%m-%d %H:%M"  # 统一用于创建/修改时间和截止日期
 PRI_COLORS = {"high": "red", "normal": "yellow", "low": "blue"}
 VALID_PRIS = list(PRI_COLORS.keys())
+PRI_RANK = {pri: i for i, pri in enumerate(VALID_PRIS)}
+VALID_STATUS = ["pending", "done"]
+_PRIORITIES = {pri: pri for pri in VALID_PRIS}  # 解析时换成这里的字符串对象，所有任务共享
+_STATUSES = {status: status for status in VALID_STATUS}
 MAX_BACKUPS = 5
+BACKUP_INTERVAL = 300  # 两次完整备份之间的最短间隔（秒）
+BACKUP_CHUNK_SIZE = 1000  # 备份按ID分段，每段的ID跨度
+ARCHIVE_AFTER_DAYS = 30  # 完成超过该天数的任务移入归档（0为不自动归档）
+ARCHIVE_COMPRESS = True  # 归档分段用gzip压缩
 MAX_CONTENT_LEN = 200
+MAX_HINT_IDS = 20  # 找不到ID时最多提示的可用ID数量
+LIST_PAGE_SIZE = 20  # list --page 未指定 --limit 时的每页条数
+REMIND_ENABLED = True  # 交互模式和serve运行期间，任务临近/到达截止时间时提醒
+REMIND_AHEAD = 15  # 提前多少分钟提醒（0表示只在到期时提醒）
+REMIND_POLL = 30  # 提醒线程最长的检查间隔（秒）
+REMIND_HOOK = os.environ.get("TODO_REMIND_HOOK", "")  # 提醒时执行的命令，任务信息通过TODO_EVENT/TODO_ID/TODO_CONTENT/TODO_DUE环境变量传入
+SERVE_HOST = "127.0.0.1"  # serve 默认只监听本机
+SERVE_PORT = 8765
+SERVE_FLUSH_DELAY = 0.005  # serve 合并写请求的时间窗口（秒），窗口内的修改只保存一次
+SERVE_MAX_BODY = 1 << 20  # 请求体上限（字节）
+STARTUP_WAIT = 0.2  # 启动时等待后台加载的秒数，超时则先显示提示符
+STORAGE_BACKEND = os.environ.get("TODO_BACKEND", "json")  # 存储后端：json（默认）或 sqlite
+SNAPSHOT_FORMAT = os.environ.get("TODO_FORMAT", "compact")  # 快照格式：compact（紧凑JSON）、pretty（缩进JSON）或 binary
+SNAPSHOT_FORMATS = ["compact", "pretty", "binary"]
+SNAPSHOT_MAGIC = b"TODOSNAP"  # 二进制快照的文件头，后跟1字节版本号和1字节编码（m=msgpack，s=struct定长字段+内容）
+SNAPSHOT_VERSION = 1
+JOURNAL_MODE = True  # 日志模式：修改以追加记录的方式写入，定期压缩为完整快照
+JOURNAL_COMPACT_THRESHOLD = 1000  # 日志记录数达到该值时压缩
+RELOAD_RETRIES = 3  # 无锁加载时正赶上其他进程压缩，最多重新加载的次数
+IMPORT_BATCH_SIZE = 1000  # 导入时每积累这么多条记录保存一次，待写入的修改不随文件大小增长
+EXPORT_FORMATS = ["ndjson", "csv"]
+EXPORT_FIELDS = ["id", "content", "priority", "status", "created", "modified", "due_date"]
+PROFILE_ENV = os.environ.get("TODO_PROFILE", "")  # 性能分析：1为记录各阶段耗时，其他值为cProfile输出文件路径
 
 # 初始化Windows颜色支持
 if COLOR_ENABLED and sys.platform == "win32":
@@ -30,173 +96,1645 @@ def colorize(text, color):
 def printc(text, color):
     print(colorize(text, color))
 
-def parse_due_date(date_str):
-    """支持多种日期格式的解析函数"""
-    if not date_str or date_str.lower() == "none":
-        return None
-    
-    # 支持的日期格式列表
-    formats = [
-        "%Y-%m-%d %H:%M",  # 完整格式
-        "%Y-%m-%d",        # 仅日期
-        "%m/%d",           # 月/日（当年）
-        "%m-%d",           # 月-日（当年）
-        "%Y/%m/%d",        # 年/月/日
-        "%Y%m%d"           # 紧凑格式
-    ]
-    
-    for fmt in formats:
-        try:
-            dt = datetime.strptime(date_str, fmt)
-            # 如果只有日期，默认设置为23:59截止
-            if fmt in ["%Y-%m-%d", "%m/%d", "%m-%d", "%Y/%m/%d", "%Y%m%d"]:
-                dt = dt.replace(hour=23, minute=59)
-                # 对于没有年份的格式，使用当前年份
-                if fmt in ["%m/%d", "%m-%d"]:
-                    dt = dt.replace(year=datetime.now().year)
-            return dt.strftime(DATE_FORMAT)
-        except ValueError:
-            continue
-    
-    # 尝试相对时间（如"tomorrow", "3days"）
-    date_str_lower = date_str.lower()
-    if date_str_lower == "tomorrow":
-        return (datetime.now() + timedelta(days=1)).replace(hour=23, minute=59).strftime(DATE_FORMAT)
-    elif date_str_lower == "today":
-        return datetime.now().replace(hour=23, minute=59).strftime(DATE_FORMAT)
-    elif date_str_lower.endswith("days"):
+
+# 性能分析（可选）：记录命令和各I/O阶段的耗时与次数，未启用时每个埋点只多一次属性判断
+class Profiler:
+    def __init__(self, setting=""):
+        self.stats = {}  # 阶段名 -> [次数, 总耗时, 最大耗时]（秒，含子阶段）
+        self.enabled = bool(setting)
+        self.cprofile_path = setting if setting not in ("", "1") else None
+        self._cprofile = None
+
+    def record(self, name, elapsed):
+        entry = self.stats.get(name)
+        if entry is None:
+            self.stats[name] = [1, elapsed, elapsed]
+        else:
+            entry[0] += 1
+            entry[1] += elapsed
+            if elapsed > entry[2]:
+                entry[2] = elapsed
+
+    def reset(self):
+        self.stats.clear()
+
+    @contextmanager
+    def command(self, name):
+        """命令级计时；设置了cProfile输出文件时同时采样，每条命令结束后写出累计结果"""
+        if self.cprofile_path and self._cprofile is None:
+            import cProfile
+            self._cprofile = cProfile.Profile()
+        if self._cprofile:
+            self._cprofile.enable()
+        start = time.perf_counter()
         try:
-            days = int(date_str_lower[:-4])
-            return (datetime.now() + timedelta(days=days)).replace(hour=23, minute=59).strftime(DATE_FORMAT)
-        except ValueError:
-            pass
-    
-    raise ValueError(f"日期格式错误，支持格式: 完整({DATE_FORMAT})、日期(YYYY-MM-DD)、相对时间(today/tomorrow/3days)等")
+            yield
+        finally:
+            self.record(f"cmd:{name}", time.perf_counter() - start)
+            if self._cprofile:
+                self._cprofile.disable()
+                self._cprofile.dump_stats(self.cprofile_path)
+
+    def report(self):
+        """按总耗时从高到低排列的统计表"""
+        if not self.stats:
+            return "暂无性能数据"
+        lines = [f"{'阶段':<24}{'次数':>8}{'总计(ms)':>12}{'平均(ms)':>12}{'最大(ms)':>12}"]
+        for name, (count, total, peak) in sorted(self.stats.items(), key=lambda item: -item[1][1]):
+            lines.append(f"{name:<26}{count:>10}{total * 1000:>14.2f}{total / count * 1000:>14.3f}{peak * 1000:>14.2f}")
+        if self.cprofile_path:
+            lines.append(f"cProfile结果: {self.cprofile_path}（python -m pstats 查看）")
+        return "\n".join(lines)
+
+PROFILER = Profiler(PROFILE_ENV)
+
+def timed(name):
+    """把函数的耗时计入PROFILER的name阶段"""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not PROFILER.enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                PROFILER.record(name, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+# 时间的内部表示：自公元1年1月1日起的分钟数（整数），只在加载/保存/显示时与DATE_FORMAT字符串互转
+def to_minutes(text):
+    """DATE_FORMAT字符串 -> 分钟数；常见的YYYY-MM-DD HH:MM形状查表解析，不走strptime"""
+    if len(text) == 16 and text[10] == " ":
+        day, clock = _day_minutes(text[:10]), _CLOCK_MINUTES.get(text[11:])
+        if day is not None and clock is not None:
+            return day + clock
+    dt = datetime.strptime(text, DATE_FORMAT)
+    return dt.toordinal() * 1440 + dt.hour * 60 + dt.minute
+
+_CLOCK_MINUTES = {f"{h:02d}:{m:02d}": h * 60 + m for h in range(24) for m in range(60)}  # "HH:MM" -> 当天分钟数
+
+# 加载时大量任务落在相同的日期上，按日期缓存
+@lru_cache(maxsize=4096)
+def _day_minutes(text):
+    """YYYY-MM-DD -> 当天0点的分钟数，形状不符返回None"""
+    if text[4] != "-" or text[7] != "-":
+        return None
+    try:
+        return date(int(text[:4]), int(text[5:7]), int(text[8:10])).toordinal() * 1440
+    except ValueError:
+        return None
 
-def is_overdue(due_date):
-    """检查任务是否已过期"""
+@lru_cache(maxsize=4096)
+def from_minutes(value):
+    """分钟数 -> DATE_FORMAT字符串"""
+    day = date.fromordinal(value // 1440)
+    hour, minute = divmod(value % 1440, 60)
+    return f"{day.year:04d}-{day.month:02d}-{day.day:02d} {hour:02d}:{minute:02d}"
+
+def now_minutes():
+    now = datetime.now()
+    return now.toordinal() * 1440 + now.hour * 60 + now.minute
+
+# 截止日期解析：按输入的形状用正则分派，不再逐个尝试strptime格式
+# 各字段沿用strptime的%m/%d/%H/%M写法，原来接受的输入（如2026115、日期和时间之间多个空格）仍然接受
+_M, _D = r"(1[0-2]|0[1-9]|[1-9])", r"(3[01]|[12]\d|0[1-9]|[1-9]| [1-9])"
+_FULL_DATE = re.compile(rf"(\d{{4}})-{_M}-{_D}\s+(2[0-3]|[01]\d|\d):([0-5]\d|\d)")  # YYYY-MM-DD HH:MM
+_DATE = re.compile(rf"(\d{{4}})-{_M}-{_D}|(\d{{4}})/{_M}/{_D}|(\d{{4}}){_M}{_D}")  # YYYY-MM-DD、YYYY/MM/DD、YYYYMMDD
+_MONTH_DAY = re.compile(rf"{_M}/{_D}|{_M}-{_D}")  # MM/DD、MM-DD（当年）
+_DAYS_LATER = re.compile(r"\s*([+-]?\d+)\s*(d|days?|w|weeks?)")  # 3days、+3days、3d、2weeks、2w
+_HOURS_LATER = re.compile(r"\s*\+?(\d+)\s*(h|hours?)")  # 3h、3hours
+_NEXT_WEEKDAY = re.compile(r"next[\s_-]*([a-z]+)")  # next monday、next-fri
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+DUE_FORMAT_ERROR = (f"日期格式错误，支持格式: 完整({DATE_FORMAT})、日期(YYYY-MM-DD)、"
+                    "相对时间(today/tomorrow/3days/2weeks/3h/next monday)等")
+
+@lru_cache(maxsize=1024)
+def _due_minutes(text, today):
+    """解析截止日期（只给日期时为当天23:59）；today（日期序号）是缓存键的一部分，相对日期跨天后自动失效"""
+    end_of_day = lambda ordinal: ordinal * 1440 + 23 * 60 + 59
+    try:
+        m = _FULL_DATE.fullmatch(text)
+        if m:
+            year, month, day, hour, minute = map(int, m.groups())
+            return date(year, month, day).toordinal() * 1440 + hour * 60 + minute
+        m = _DATE.fullmatch(text)
+        if m:
+            year, month, day = (int(g) for g in m.groups() if g is not None)
+            return end_of_day(date(year, month, day).toordinal())
+        m = _MONTH_DAY.fullmatch(text)
+        if m:
+            month, day = (int(g) for g in m.groups() if g is not None)
+            return end_of_day(date(date.fromordinal(today).year, month, day).toordinal())
+        if text == "today":
+            return end_of_day(today)
+        if text == "tomorrow":
+            return end_of_day(today + 1)
+        m = _DAYS_LATER.fullmatch(text)
+        if m:
+            days = int(m.group(1)) * (7 if m.group(2).startswith("w") else 1)
+            return end_of_day(today + days)
+        m = _NEXT_WEEKDAY.fullmatch(text)
+        if m:
+            names = [w for w in WEEKDAYS if len(m.group(1)) >= 3 and w.startswith(m.group(1))]
+            if len(names) == 1:
+                # 下一个该星期几（不含今天），最多7天后
+                days = (WEEKDAYS.index(names[0]) - date.fromordinal(today).weekday() - 1) % 7 + 1
+                return end_of_day(today + days)
+    except (ValueError, OverflowError):
+        pass
+    raise ValueError(DUE_FORMAT_ERROR)
+
+@timed("parse_due_date")
+def parse_due_minutes(date_str):
+    """解析截止日期，返回分钟数；空值或"none"返回None"""
+    if not date_str:
+        return None
+    text = date_str.lower()
+    if text == "none":
+        return None
+    # 按小时的相对时间精确到当前分钟，不缓存
+    m = _HOURS_LATER.fullmatch(text)
+    if m:
+        return now_minutes() + int(m.group(1)) * 60
+    return _due_minutes(text, date.today().toordinal())
+
+def due_span(date_str):
+    """日期条件的时间范围 (起, 止)，均为分钟数：只给出日期（不含时间）时为整天，否则精确到分钟"""
+    end = parse_due_minutes(date_str)
+    if end is None:
+        raise ValueError(DUE_FORMAT_ERROR)
+    if ":" in date_str or _HOURS_LATER.fullmatch(date_str.lower()):
+        return end, end
+    start = end - end % 1440
+    return start, start + 1439
+
+def parse_due_date(date_str):
+    """支持多种日期格式的解析函数，返回DATE_FORMAT字符串"""
+    minutes = parse_due_minutes(date_str)
+    return from_minutes(minutes) if minutes is not None else None
+
+def is_overdue(due_date, now=None):
+    """检查任务是否已过期（due_date可以是分钟数或DATE_FORMAT字符串）"""
     if not due_date:
         return False
     try:
-        due = datetime.strptime(due_date, DATE_FORMAT)
-        return datetime.now() > due
-    except:
+        due = due_date if isinstance(due_date, int) else to_minutes(due_date)
+    except ValueError:
         return False
+    return (now_minutes() if now is None else now) >= due
 
-def print_task(task):
-    status = colorize("✓", "green") if task["status"] == "done" else colorize("◻", "red")
-    pri_mark = colorize("◆", PRI_COLORS[task["priority"]])
-    modified = f"(修改于: {task['modified']})" if task['modified'] != task['created'] else ""
+def format_task(task, now=None):
+    status = colorize("✓", "green") if task.status == "done" else colorize("◻", "red")
+    pri_mark = colorize("◆", PRI_COLORS[task.priority])
+    modified = f"(修改于: {from_minutes(task.modified)})" if task.modified != task.created else ""
     
     # 处理截止日期显示（过期标红）
     due_str = ""
-    if task.get("due_date"):
-        due_color = "red" if is_overdue(task["due_date"]) else "blue"
-        due_str = colorize(f"[截止: {task['due_date']}]", due_color)
+    if task.due_date:
+        due_color = "red" if is_overdue(task.due_date, now) else "blue"
+        due_str = colorize(f"[截止: {from_minutes(task.due_date)}]", due_color)
     
-    print(f"#{task['id']} {status} {pri_mark} {task['created']} {modified} {due_str} -> {task['content']}")
+    return f"#{task.id} {status} {pri_mark} {from_minutes(task.created)} {modified} {due_str} -> {task.content}"
+
+@timed("print_tasks")
+def print_tasks(tasks):
+    """批量输出任务：先拼成一个字符串再一次性写入终端"""
+    now = now_minutes()
+    sys.stdout.write("".join(format_task(t, now) + "\n" for t in tasks))
+    sys.stdout.flush()
+
+
+# 任务记录：使用__slots__代替每个任务一个dict；10万个任务约68MB→31MB（含内容字符串，约2.2倍）
+class Task:
+    __slots__ = ("id", "content", "priority", "status", "created", "modified", "due_date")
 
+    def __init__(self, id, content, priority, status, created, modified, due_date=None):
+        self.id = id
+        self.content = content
+        self.priority = priority
+        self.status = status
+        self.created = created
+        self.modified = modified
+        self.due_date = due_date
 
-# 装饰器（保持不变）
+    def __repr__(self):
+        return f"Task({self.to_record()!r})"
+
+    @classmethod
+    def from_record(cls, record):
+        """JSON记录 -> Task，校验字段并把时间转换为分钟数"""
+        if not isinstance(record, dict):
+            raise ValueError("缺少必要字段")
+        try:
+            task_id, content = record["id"], record["content"]
+            priority, status = record["priority"], record["status"]
+            created, modified = record["created"], record["modified"]
+        except KeyError:
+            raise ValueError("缺少必要字段")
+        
+        if not isinstance(task_id, int) or task_id <= 0:
+            raise ValueError(f"无效ID: {task_id}")
+        if not isinstance(content, str):
+            raise ValueError(f"无效内容: {content!r}")
+        # 优先级/状态取常量表中的字符串，所有任务共享同一对象
+        priority = _PRIORITIES.get(priority) if isinstance(priority, str) else None
+        if priority is None:
+            raise ValueError(f"无效优先级: {record['priority']}")
+        status = _STATUSES.get(status) if isinstance(status, str) else None
+        if status is None:
+            raise ValueError(f"无效状态: {record['status']}")
+        
+        # 可选字段due_date格式验证（兼容没有due_date的旧版本数据）
+        due_date = record.get("due_date")
+        if due_date:
+            try:
+                due_date = to_minutes(due_date)
+            except (TypeError, ValueError):
+                raise ValueError(f"截止日期格式错误: {due_date}（应为{DATE_FORMAT}）")
+        else:
+            due_date = None
+        stamps = []
+        for value in (created, modified):
+            try:
+                stamps.append(to_minutes(value))
+            except (TypeError, ValueError):
+                raise ValueError(f"时间格式错误: {value}（应为{DATE_FORMAT}）")
+        return cls(task_id, content, priority, status, stamps[0], stamps[1], due_date)
+
+    @classmethod
+    def from_row(cls, row):
+        """二进制快照中的一行 -> Task（时间已是分钟数，优先级/状态为常量表下标）"""
+        try:
+            task_id, content, pri, status, created, modified, due_date = row
+        except (TypeError, ValueError):
+            raise ValueError("缺少必要字段")
+        if not isinstance(task_id, int) or task_id <= 0:
+            raise ValueError(f"无效ID: {task_id}")
+        if not isinstance(content, str):
+            raise ValueError(f"无效内容: {content!r}")
+        if not isinstance(pri, int) or not 0 <= pri < len(VALID_PRIS):
+            raise ValueError(f"无效优先级: {pri}")
+        if not isinstance(status, int) or not 0 <= status < len(VALID_STATUS):
+            raise ValueError(f"无效状态: {status}")
+        for value in (created, modified) if due_date is None else (created, modified, due_date):
+            # 必须是可转换为日期的分钟数
+            if not isinstance(value, int) or not 1440 <= value < (date.max.toordinal() + 1) * 1440:
+                raise ValueError(f"时间格式错误: {value!r}")
+        return cls(task_id, content, VALID_PRIS[pri], VALID_STATUS[status], created, modified, due_date)
+
+    def to_row(self):
+        """Task -> 二进制快照中的一行"""
+        return (self.id, self.content, PRI_RANK[self.priority], VALID_STATUS.index(self.status),
+                self.created, self.modified, self.due_date)
+
+    def to_record(self):
+        """Task -> JSON记录（与~/.todo.json的格式一致）"""
+        return {
+            "id": self.id,
+            "content": self.content,
+            "priority": self.priority,
+            "status": self.status,
+            "created": from_minutes(self.created),
+            "modified": from_minutes(self.modified),
+            "due_date": from_minutes(self.due_date) if self.due_date is not None else None
+        }
+
+
+# 装饰器（返回命令是否执行成功，供脚本模式统计失败数）
 def cmd_handler(func):
+    name = func.__name__[:-4] if func.__name__.endswith("_cmd") else func.__name__
+    
     @wraps(func)
     def wrapper(manager, args):
         try:
-            func(manager, args)
+            if PROFILER.enabled:
+                with PROFILER.command(name):
+                    func(manager, args)
+            else:
+                func(manager, args)
+            return True
         except ValueError as e:
             printc(str(e), "red")
         except Exception as e:
             printc(f"错误: {e}", "red")
+        return False
     return wrapper
 
 
-class TodoManager:
+def db_file():
+    """SQLite数据库文件（~/.todo.db）"""
+    return TODO_FILE.with_suffix(".db")
+
+def index_file():
+    """搜索索引文件（~/.todo.json.idx）"""
+    return TODO_FILE.with_name(TODO_FILE.name + ".idx")
+
+_NON_SPACE = re.compile(r"\S")
+
+def iter_json_array(f, chunk_size=1 << 16):
+    """流式解析JSON数组，逐条产出元素；遇到语法错误时报告出错的是第几条记录"""
+    decoder = json.JSONDecoder()
+    buf, pos, eof = "", 0, False
+
+    def peek():
+        # 返回下一个非空白字符（不消耗），文件结束返回空串
+        nonlocal buf, pos, eof
+        while True:
+            m = _NON_SPACE.search(buf, pos)
+            if m:
+                pos = m.start()
+                return buf[pos]
+            if eof:
+                return ""
+            buf, pos = f.read(chunk_size), 0
+            eof = not buf
+
+    def decode():
+        nonlocal buf, pos, eof
+        while True:
+            try:
+                value, end = decoder.raw_decode(buf, pos)
+                if end < len(buf) or eof:
+                    pos = end
+                    return value
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            # 元素跨越了缓冲区边界，读入更多内容后重试
+            more = f.read(chunk_size)
+            eof = not more
+            buf, pos = buf[pos:] + more, 0
+
+    if peek() == "":
+        return  # 空文件视为没有任务
+    if peek() != "[":
+        raise ValueError("数据格式错误")
+    pos += 1
+    if peek() == "]":
+        return
+    n = 0
+    while True:
+        n += 1
+        peek()
+        try:
+            value = decode()
+        except json.JSONDecodeError as e:
+            raise ValueError(f"第 {n} 条记录损坏（{e.msg}）")
+        yield value
+        c = peek()
+        if c == "]":
+            return
+        if c == "":
+            raise ValueError(f"文件在第 {n} 条记录之后被截断")
+        if c != ",":
+            raise ValueError(f"第 {n} 条记录之后格式错误")
+        pos += 1
+
+def encode_json(obj):
+    """紧凑JSON（UTF-8字节）：有orjson时用orjson，否则用标准库的C编码器"""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def decode_json(data):
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+# 标准库编码的一行：ID、优先级、状态、是否有截止日期、创建/修改/截止时间（分钟数）、内容字节数，后接UTF-8内容
+_ROW = struct.Struct("<QBBBqqqI")
+
+def _pack_rows(rows):
+    parts = []
+    for task_id, content, pri, status, created, modified, due_date in rows:
+        data = content.encode("utf-8")
+        parts.append(_ROW.pack(task_id, pri, status, due_date is not None, created, modified, due_date or 0, len(data)))
+        parts.append(data)
+    return b"".join(parts)
+
+def _unpack_rows(data):
+    """struct编码的行；字段越界或长度不符时报错，不会读出不完整的记录"""
+    offset, end = 0, len(data)
+    while offset < end:
+        if end - offset < _ROW.size:
+            raise ValueError("文件被截断")
+        task_id, pri, status, has_due, created, modified, due_date, size = _ROW.unpack_from(data, offset)
+        offset += _ROW.size
+        if end - offset < size:
+            raise ValueError("文件被截断")
+        try:
+            content = data[offset:offset + size].decode("utf-8")
+        except UnicodeDecodeError:
+            content = None  # 由Task.from_row报告为无效记录并跳过
+        offset += size
+        yield task_id, content, pri, status, created, modified, due_date if has_due else None
+
+def encode_snapshot(rows):
+    """二进制快照：文件头 + msgpack（已安装时）或struct编码的行"""
+    if msgpack is not None:
+        codec, payload = b"m", msgpack.packb(rows)
+    else:
+        codec, payload = b"s", _pack_rows(rows)
+    return SNAPSHOT_MAGIC + bytes([SNAPSHOT_VERSION]) + codec + payload
+
+def iter_snapshot_rows(f):
+    """按文件头选择解码器，逐行产出二进制快照中的任务（f为二进制模式打开的文件）"""
+    header = f.read(len(SNAPSHOT_MAGIC) + 2)
+    if len(header) < len(SNAPSHOT_MAGIC) + 2 or not header.startswith(SNAPSHOT_MAGIC):
+        raise ValueError("数据格式错误")
+    version, codec = header[-2], header[-1:]
+    if version != SNAPSHOT_VERSION:
+        raise ValueError(f"不支持的快照版本: {version}（请升级程序）")
+    if codec == b"m" and msgpack is None:
+        raise ValueError("快照使用msgpack编码，请先安装msgpack（pip install msgpack）")
+    if codec == b"s":
+        yield from _unpack_rows(f.read())
+        return
+    if codec != b"m":
+        raise ValueError(f"未知的快照编码: {codec!r}")
+    try:
+        rows = msgpack.unpackb(f.read())
+    except Exception as e:
+        raise ValueError(f"快照解码失败: {e}")
+    if not isinstance(rows, (list, tuple)):
+        raise ValueError("数据格式错误")
+    yield from rows
+
+def snapshot_format(path):
+    """根据文件头判断已有快照的格式，文件不存在或为空返回None"""
+    try:
+        with open(path, "rb") as f:
+            head = f.read(len(SNAPSHOT_MAGIC))
+    except OSError:
+        return None
+    return _format_of(head)
+
+def _format_of(head):
+    if not head:
+        return None
+    if head.startswith(SNAPSHOT_MAGIC):
+        return "binary"
+    return "pretty" if head.startswith((b"[\n", b"[\r\n")) else "compact"
+
+def snapshot_id(data):
+    """快照内容的标识（长度+CRC32）：日志第一行记录它所基于的快照，压缩中断后留下的旧日志据此识别"""
+    return [len(data), zlib.crc32(data)]
+
+def file_signature(path):
+    """文件签名（inode+修改时间+大小），用于判断索引是否与快照一致、文件是否被其他进程改写"""
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return [st.st_ino, st.st_mtime_ns, st.st_size]
+
+def atomic_write(path, write, binary=False):
+    """先写临时文件再原子替换，写入中断不会留下半截文件"""
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp, "wb") if binary else open(tmp, "w", encoding="utf-8") as f:
+        write(f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+def data_format(path, fmt=None):
+    """导入/导出格式：未指定时按扩展名判断，.csv为CSV，其余（含标准输入输出）为NDJSON"""
+    if fmt:
+        return fmt
+    return "csv" if path != "-" and Path(path).suffix.lower() == ".csv" else "ndjson"
+
+def iter_import_rows(f, fmt):
+    """逐行读取导入数据，产出 (行号, 记录)；NDJSON行解析失败时记录为对应的异常"""
+    if fmt == "csv":
+        reader = csv.DictReader(f)
+        for row in reader:
+            # 空单元格视为未填写，多出的列（键为None）忽略
+            yield reader.line_num, {k: v for k, v in row.items() if k and v not in ("", None)}
+        return
+    for lineno, line in enumerate(f, 1):
+        if not line.strip():
+            continue
+        try:
+            yield lineno, json.loads(line)
+        except ValueError as e:
+            yield lineno, ValueError(f"JSON解析失败: {e}")
+
+def write_export(f, records, fmt):
+    """流式写出记录，返回条数"""
+    if fmt == "csv":
+        writer = csv.DictWriter(f, EXPORT_FIELDS, lineterminator="\n")
+        writer.writeheader()
+        write = writer.writerow
+    else:
+        write = lambda r: f.write(json.dumps(r, ensure_ascii=False) + "\n")
+    count = 0
+    for record in records:
+        write(record)
+        count += 1
+    return count
+
+@contextmanager
+def file_lock(path):
+    """进程间互斥锁（排他锁，只用于写入）"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a+b") as f:
+        if fcntl:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+# 全文索引：按字符切分一元/二元语法，中文无需分词即可检索
+class SearchIndex:
+    VERSION = 2  # 2: 倒排表改为有序ID数组，索引文件为JSON头一行 + 各数组的原始字节
+    TYPECODE = "Q"  # 任务ID按64位无符号整数存放，与二进制快照一致
+
     def __init__(self):
-        self.tasks = self._load()
-        self.next_id = max((t["id"] for t in self.tasks), default=0) + 1
+        # 语法片段 -> 升序排列的任务ID数组；每个ID只占8字节，set每项要几十字节外加一个int对象
+        self.postings = {}
 
-    # 加载任务（更新验证逻辑以支持due_date）
-    def _load(self):
-        if not TODO_FILE.exists():
-            return []
+    @staticmethod
+    def _grams(text):
+        text = text.lower()
+        grams = set(text)
+        grams.update(text[i:i + 2] for i in range(len(text) - 1))
+        return grams
+
+    def add(self, task_id, content):
+        for g in self._grams(content):
+            ids = self.postings.get(g)
+            if ids is None:
+                self.postings[g] = array(self.TYPECODE, (task_id,))
+            elif ids[-1] < task_id:
+                ids.append(task_id)  # 新任务的ID最大，通常直接追加到末尾
+            else:
+                i = bisect_left(ids, task_id)
+                if i == len(ids) or ids[i] != task_id:
+                    ids.insert(i, task_id)
+
+    def remove(self, task_id, content):
+        for g in self._grams(content):
+            ids = self.postings.get(g)
+            if ids is None:
+                continue
+            i = bisect_left(ids, task_id)
+            if i < len(ids) and ids[i] == task_id:
+                del ids[i]
+                if not ids:
+                    del self.postings[g]
+
+    def clear(self):
+        self.postings.clear()
+
+    def candidates(self, term):
+        """返回可能包含term的任务ID集合（需再做子串校验）"""
+        term = term.lower()
+        grams = [term[i:i + 2] for i in range(len(term) - 1)] or [term]
+        postings = sorted((self.postings.get(g, ()) for g in set(grams)), key=len)
+        # 从最短的倒排表开始求交集
+        ids = set(postings[0])
+        for other in postings[1:]:
+            if not ids:
+                break
+            ids.intersection_update(other)
+        return ids
+
+    # 持久化：索引只在与快照文件签名一致时有效，日志部分在加载时增量回放
+    @timed("index.load")
+    def load_or_build(self, tasks, source_sig):
         try:
-            with open(TODO_FILE, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                if not isinstance(data, list):
-                    raise ValueError("数据格式错误")
-                [self._validate(t) for t in data]
-                return data
-        except (json.JSONDecodeError, ValueError) as e:
-            printc(f"数据错误: {e}", "red")
-            self._reset_data()
-            return []
+            with open(index_file(), "rb") as f:
+                header = decode_json(f.readline())
+                if (header.get("version") == self.VERSION and source_sig and header.get("source") == source_sig
+                        and header.get("byteorder") == sys.byteorder):
+                    data = memoryview(f.read())
+                    postings, offset = {}, 0
+                    for g, count in header["grams"]:
+                        ids = array(self.TYPECODE)
+                        end = offset + count * ids.itemsize
+                        ids.frombytes(data[offset:end])
+                        postings[g] = ids
+                        offset = end
+                    if offset == len(data):  # 文件被截断时长度对不上，重建
+                        self.postings = postings
+                        return
+        except (OSError, ValueError, KeyError, AttributeError, TypeError):
+            pass
+        self.clear()
+        for t in tasks:
+            self.add(t.id, t.content)
+        self.save(source_sig)
 
-    # 验证任务格式（新增due_date字段检查和数据兼容性）
-    def _validate(self, task):
-        required = ["id", "content", "priority", "status", "created", "modified"]
-        if not all(k in task for k in required):
-            raise ValueError("缺少必要字段")
+    @timed("index.save")
+    def save(self, source_sig):
+        if not source_sig:
+            return
+        postings = list(self.postings.items())
+        header = {"version": self.VERSION, "source": source_sig, "byteorder": sys.byteorder,
+                  "grams": [[g, len(ids)] for g, ids in postings]}
+        try:
+            payload = encode_json(header) + b"\n" + b"".join(ids.tobytes() for _, ids in postings)
+            atomic_write(index_file(), lambda f: f.write(payload), binary=True)
+        except OSError as e:
+            printc(f"索引保存警告: {e}", "yellow")
+
+
+# 统计聚合：随每次修改增量更新，get_stats无需遍历全部任务
+class TaskStats:
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.total = 0
+        self.done = 0
+        self.priority = Counter()
+        self.created_by_day = Counter()  # 日序号 -> 新增数
+        self.completed_by_day = Counter()  # 日序号 -> 完成数（以修改时间计）
+        self.pending_due = []  # 待办任务截止日期，有序，用于二分统计过期数
+
+    def add(self, task):
+        if self._count(task):
+            insort(self.pending_due, task.due_date)
+
+    def build(self, tasks):
+        """批量加载：截止日期收集完后只排序一次，避免逐条insort的O(n²)"""
+        self.clear()
+        for task in tasks:
+            if self._count(task):
+                self.pending_due.append(task.due_date)
+        self.pending_due.sort()
+
+    def _count(self, task):
+        """计入各项计数，返回是否为有截止日期的待办（需记入pending_due）"""
+        self.total += 1
+        self.priority[task.priority] += 1
+        self.created_by_day[task.created // 1440] += 1
+        if task.status == "done":
+            self.done += 1
+            self.completed_by_day[task.modified // 1440] += 1
+            return False
+        return bool(task.due_date)
+
+    def remove(self, task):
+        self.total -= 1
+        self.priority[task.priority] -= 1
+        self.created_by_day[task.created // 1440] -= 1
+        if task.status == "done":
+            self.done -= 1
+            self.completed_by_day[task.modified // 1440] -= 1
+        elif task.due_date:
+            i = bisect_right(self.pending_due, task.due_date) - 1
+            del self.pending_due[i]
+
+    def overdue(self, now):
+        """截止日期不晚于now（分钟数）的待办任务数"""
+        return bisect_right(self.pending_due, now)
+
+
+# 过滤表达式：空格分隔的条件全部满足才匹配，如 "pri:high status:pending due<2026-11-01 text:报告"
+# 条件前加"-"表示取反；不带字段的词按 text: 处理。文本和ID条件用索引缩小候选集，其余条件逐个判断
+class Query:
+    _TERM = re.compile(r"^(-?)([a-z]+)(<=|>=|:|<|>|=)(.+)$")
+    FIELDS = {"pri": "priority", "priority": "priority", "status": "status", "text": "text",
+              "id": "id", "due": "due_date", "created": "created", "modified": "modified"}
+    USAGE = ("条件格式: pri:high[,normal] status:pending|done text:关键词 id:3|1-10 id>100 "
+             "due<日期 due>=日期 due:none|any created>=日期 modified<日期，前加-取反")
+
+    def __init__(self, text):
+        self.text = " ".join(text) if isinstance(text, (list, tuple)) else text
+        self.filters = []  # 判断函数列表
+        self.index_terms = []  # 可走索引的条件: ("text", 关键词) 或 ("id", range)
+        self.bare_words = []  # 没写字段、按text:处理的词
+        for token in self.text.split():
+            self._compile(token)
+        if not self.filters:
+            raise ValueError("过滤表达式为空")
+
+    def __repr__(self):
+        return f"Query({self.text!r})"
+
+    def _compile(self, token):
+        m = self._TERM.match(token)
+        if m:
+            negate, field, op, value = m.groups()
+            if field not in self.FIELDS:
+                raise ValueError(f"未知字段: {field}（{self.USAGE}）")
+            field = self.FIELDS[field]
+        elif token.startswith("-") and len(token) > 1:
+            negate, field, op, value = "-", "text", ":", token[1:]
+            self.bare_words.append(token)
+        else:
+            negate, field, op, value = "", "text", ":", token
+            self.bare_words.append(token)
         
-        # 数据兼容性：自动补全旧版本数据
-        if "due_date" not in task:
-            task["due_date"] = None
+        index = None
+        if field == "text":
+            if op != ":":
+                raise ValueError(f"text只支持 text:关键词（{token}）")
+            term = value.lower()
+            pred = lambda t: term in t.content.lower()
+            index = ("text", term)
+        elif field in ("priority", "status"):
+            if op not in (":", "="):
+                raise ValueError(f"{field}只支持 {field}:值（{token}）")
+            choices = VALID_PRIS if field == "priority" else VALID_STATUS
+            values = set(value.split(","))
+            if not values <= set(choices):
+                raise ValueError(f"{token}: 可选值为 {', '.join(choices)}")
+            pred = (lambda t: t.priority in values) if field == "priority" else (lambda t: t.status in values)
+        elif field == "id":
+            low, high = self._id_range(op, value, token)
+            pred = lambda t: low <= t.id <= high
+            index = ("id", range(low, high + 1))
+        else:
+            pred = self._date_filter(field, op, value, token)
         
-        # 可选字段due_date格式验证
-        if task["due_date"]:
+        if negate:
+            self.filters.append(lambda t, pred=pred: not pred(t))
+        else:
+            self.filters.append(pred)
+            if index:
+                self.index_terms.append(index)
+
+    @staticmethod
+    def _id_range(op, value, token):
+        try:
+            if op in (":", "=") and "-" in value:
+                low, high = map(int, value.split("-", 1))
+            else:
+                low = high = int(value)
+        except ValueError:
+            raise ValueError(f"无效的ID条件: {token}")
+        if op == "<":
+            low, high = 1, high - 1
+        elif op == "<=":
+            low = 1
+        elif op == ">":
+            low, high = low + 1, sys.maxsize
+        elif op == ">=":
+            high = sys.maxsize
+        return max(low, 1), high  # ID从1开始，id>=0、id>-1 等同于不限下界
+
+    @staticmethod
+    def _date_filter(field, op, value, token):
+        """日期比较：只给出日期（不含时间）时按整天计算，如 due<2026-11-01 指11月1日之前"""
+        get = lambda t: getattr(t, field)
+        if value.lower() in ("none", "any"):
+            if field != "due_date" or op not in (":", "="):
+                raise ValueError(f"无效的日期条件: {token}")
+            want = value.lower() == "any"
+            return lambda t: (t.due_date is not None) == want
+        try:
+            start, end = due_span(value)
+        except ValueError:
+            raise ValueError(f"无效的日期条件: {token}（日期格式同 --due）")
+        tests = {
+            "<": lambda x: x < start,
+            "<=": lambda x: x <= end,
+            ">": lambda x: x > end,
+            ">=": lambda x: x >= start,
+            ":": lambda x: start <= x <= end,
+            "=": lambda x: start <= x <= end,
+        }
+        test = tests[op]
+        return lambda t: get(t) is not None and test(get(t))
+
+    def match(self, task):
+        return all(f(task) for f in self.filters)
+
+
+# 到期提醒：待办任务的提醒时间放在最小堆中，随_track/_untrack增量更新；失效的堆项在弹出时跳过
+class ReminderQueue:
+    def __init__(self):
+        self._lock = threading.Lock()  # 提醒线程与修改任务的线程共用
+        self.changed = threading.Event()  # 加入了新的提醒，提醒线程需要重新计算等待时间
+        self._heap = []  # (提醒时间, 任务ID, 截止时间, 事件)，时间均为分钟数
+        self._due = {}  # 任务ID -> 当前有效的截止时间
+
+    def _entries(self, task, now):
+        if task.status != "pending" or task.due_date is None:
+            return []
+        entries = [(task.due_date, task.id, task.due_date, "due")]
+        if REMIND_AHEAD > 0:
+            entries.append((task.due_date - REMIND_AHEAD, task.id, task.due_date, "soon"))
+        # 只安排将来的提醒，启动前就已过期的任务由启动提示统一报告
+        return [e for e in entries if e[0] > now]
+
+    def build(self, tasks):
+        """加载时一次性建堆（O(n)）"""
+        now = now_minutes()
+        # 截止时间已过的任务不会再有提醒，先排除，不必逐个生成条目
+        heap = [e for t in tasks if t.due_date is not None and t.due_date > now for e in self._entries(t, now)]
+        heapq.heapify(heap)
+        with self._lock:
+            self._heap = heap
+            self._due = {e[1]: e[2] for e in heap}
+
+    def add(self, task):
+        entries = self._entries(task, now_minutes())
+        if not entries:
+            return
+        with self._lock:
+            self._due[task.id] = task.due_date
+            for e in entries:
+                heapq.heappush(self._heap, e)
+            if len(self._heap) > 2 * len(self._due) + 64:
+                self._compact()
+        self.changed.set()
+
+    def remove(self, task):
+        with self._lock:
+            self._due.pop(task.id, None)
+
+    def clear(self):
+        with self._lock:
+            self._heap = []
+            self._due = {}
+
+    def _compact(self):
+        # 失效项过多时重建堆，防止反复修改截止日期使堆无限增长
+        self._heap = [e for e in self._heap if self._due.get(e[1]) == e[2]]
+        heapq.heapify(self._heap)
+
+    def pop_ready(self, now):
+        """弹出提醒时间已到的 (事件, 任务ID)"""
+        fired = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                _, task_id, due, kind = heapq.heappop(self._heap)
+                if self._due.get(task_id) != due:
+                    continue
+                fired.append((kind, task_id))
+                if kind == "due":
+                    del self._due[task_id]  # 到期是最后一次提醒
+        return fired
+
+    def next_time(self):
+        """最近一次有效提醒的时间（分钟数），没有则返回None"""
+        with self._lock:
+            while self._heap and self._due.get(self._heap[0][1]) != self._heap[0][2]:
+                heapq.heappop(self._heap)
+            return self._heap[0][0] if self._heap else None
+
+
+# 存储后端：TodoManager只通过 exists/load_snapshot/load_ops/commit/lock/changed 与存储交互
+class JsonStorage:
+    """JSON快照（~/.todo.json）+ 追加日志（~/.todo.json.journal），默认后端"""
+    name = "json"
+
+    def __init__(self, path=None):
+        if SNAPSHOT_FORMAT not in SNAPSHOT_FORMATS:
+            raise ValueError(f"未知快照格式: {SNAPSHOT_FORMAT}（可选 {'/'.join(SNAPSHOT_FORMATS)}）")
+        self.path = Path(path) if path else TODO_FILE
+        self.journal = self.path.with_name(self.path.name + ".journal")
+        self.lock_path = self.path.with_name(self.path.name + ".lock")
+        self.journal_records = 0
+        self.journal_offset = 0  # 已读取/写入的日志字节数
+        self.base = snapshot_id(b"")  # 已加载快照的标识，日志开头记录的标识与之不同时说明日志已过期
+        self.snapshot_sig = None  # 加载时快照的签名，用于发现其他进程的压缩
+        self.needs_compact = False  # 快照有损坏记录或格式与SNAPSHOT_FORMAT不同时，下次保存直接重写快照
+
+    def lock(self):
+        return file_lock(self.lock_path)
+
+    def changed(self):
+        """检查其他进程的修改：快照被重写返回"reload"，日志有新记录返回"append"，否则None"""
+        if file_signature(self.path) != self.snapshot_sig:
+            return "reload"
+        try:
+            size = self.journal.stat().st_size
+        except OSError:
+            size = 0
+        if size < self.journal_offset:
+            return "reload"
+        return "append" if size > self.journal_offset else None
+
+    def exists(self):
+        return self.path.exists() or self.journal.exists()
+
+    def signature(self):
+        """快照签名，持久化的搜索索引以此判断是否有效"""
+        return file_signature(self.path)
+
+    @timed("storage.load_snapshot")
+    def load_snapshot(self):
+        """按文件头选择解码器读取快照并逐条校验；损坏的记录只报告第一条并跳过，不会清空整个文件"""
+        self.journal_records = 0
+        self.journal_offset = 0
+        try:
+            with open(self.path, "rb") as f:
+                # 签名与内容取自同一个打开的文件，读取期间快照被替换也不会错配
+                st = os.fstat(f.fileno())
+                data = f.read()
+        except FileNotFoundError:
+            self.snapshot_sig = None
+            self.base = snapshot_id(b"")
+            return []
+        self.snapshot_sig = [st.st_ino, st.st_mtime_ns, st.st_size]
+        self.base = snapshot_id(data)
+        fmt = _format_of(data[:len(SNAPSHOT_MAGIC)])
+        if fmt is None:
+            return []
+        if fmt != SNAPSHOT_FORMAT:
+            self.needs_compact = True  # 切换了格式：下次保存时按新格式重写
+        tasks = []
+        errors = 0
+        if fmt == "binary":
+            records, convert = iter_snapshot_rows(io.BytesIO(data)), Task.from_row
+        else:
+            records, convert = self._json_records(data), Task.from_record
+        try:
+            for n, record in enumerate(records, 1):
+                try:
+                    tasks.append(convert(record))
+                except ValueError as e:
+                    errors += 1
+                    if errors == 1:
+                        printc(f"数据错误: 第 {n} 条记录无效（{e}），已跳过", "red")
+        except ValueError as e:
+            errors += 1
+            printc(f"数据错误: {e}，已保留之前的 {len(tasks)} 个任务", "red")
+        if errors:
+            # 快照损坏后内容已变，无法再与日志开头记录的标识比对，照常回放日志
+            self.base = None
+            self._preserve_corrupt(errors)
+        return tasks
+
+    @staticmethod
+    def _json_records(data):
+        """完好的快照整体解析（快）；解析失败时改用流式读取，保留损坏处之前的记录并报告位置"""
+        try:
+            records = decode_json(data)
+        except ValueError:
+            records = None
+        if isinstance(records, list):
+            return records
+        return iter_json_array(io.TextIOWrapper(io.BytesIO(data), encoding="utf-8"))
+
+    # 保留损坏的原文件，避免下次重写快照时丢失
+    def _preserve_corrupt(self, errors):
+        copy = self.path.with_name(self.path.name + ".corrupt")
+        try:
+            copyfile(self.path, copy)
+            printc(f"共 {errors} 处错误，原文件已另存为 {copy}", "yellow")
+        except OSError as e:
+            printc(f"备份损坏文件失败: {e}", "yellow")
+        self.needs_compact = True
+
+    def load_ops(self):
+        """从上次读到的位置起依次产出日志中的修改记录 (op, task, task_id)，损坏的记录跳过"""
+        try:
+            f = open(self.journal, "rb")
+        except FileNotFoundError:
+            return  # 没有日志，或无锁读取时被其他进程的压缩删除（快照签名随之改变，会重新加载）
+        with f:
+            f.seek(self.journal_offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # 末尾未写完的记录（写入中断或正在写入），忽略
+                first = not self.journal_offset
+                self.journal_offset += len(line)
+                lineno = self.journal_records + 1
+                try:
+                    record = json.loads(line)
+                    if first and not self._current(record):
+                        if file_signature(self.path) != self.snapshot_sig:
+                            # 无锁读取时其他进程已压缩：这是基于新快照的日志，不是过期日志，重新加载即可
+                            self.journal_offset = 0
+                            return
+                        # 压缩在替换快照之后、删除日志之前中断：日志中的修改都已包含在快照里
+                        printc("日志早于当前快照（上次压缩被中断），已忽略", "yellow")
+                        self.journal_offset = f.seek(0, os.SEEK_END)
+                        self.needs_compact = True
+                        return
+                    if record["op"] == "base":
+                        continue
+                    if record["op"] == "put":
+                        item = ("put", Task.from_record(record["task"]), None)
+                    elif record["op"] == "del":
+                        item = ("del", None, record["id"])
+                    elif record["op"] == "clear":
+                        item = ("clear", None, None)
+                    else:
+                        raise ValueError(f"未知操作: {record['op']}")
+                except (json.JSONDecodeError, KeyError, TypeError, ValueError) as e:
+                    printc(f"日志第 {lineno} 行已跳过: {e}", "yellow")
+                    continue
+                self.journal_records += 1
+                yield item
+
+    def _current(self, record):
+        """日志第一条记录：所记录的快照标识与已加载的快照相同时日志有效（旧版本的日志没有这一行，照常回放）"""
+        if not isinstance(record, dict) or record.get("op") != "base" or self.base is None:
+            return True
+        return record.get("snapshot") == self.base
+
+    @timed("storage.commit")
+    def commit(self, ops, tasks):
+        """保存修改：日志模式下只追加本次修改，记录过多时压缩为快照；返回是否重写了快照"""
+        if not JOURNAL_MODE or self.needs_compact or self.journal_records + len(ops) >= JOURNAL_COMPACT_THRESHOLD:
+            self.compact(tasks)
+            return True
+        self._append(ops)
+        return False
+
+    def _append(self, ops):
+        lines = []
+        for op, task, task_id in ops:
+            if op == "put":
+                record = {"op": op, "task": task.to_record()}
+            elif op == "del":
+                record = {"op": op, "id": task_id}
+            else:
+                record = {"op": op}
+            lines.append(json.dumps(record, ensure_ascii=False) + "\n")
+        data = "".join(lines).encode("utf-8")
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.journal, "a+b") as f:
+            if not self._truncate_torn_tail(f) and self.base is not None:
+                # 新日志以所基于的快照标识开头
+                data = (json.dumps({"op": "base", "snapshot": self.base}) + "\n").encode("utf-8") + data
+            f.write(data)
+        self.journal_records += len(lines)
+        self.journal_offset += len(data)
+
+    # 写入中断留下的半行记录：持有锁时不会有其他进程正在写，截掉它，否则新记录会接在半行后面一起损坏
+    def _truncate_torn_tail(self, f):
+        """返回截断后的日志大小"""
+        size = f.seek(0, os.SEEK_END)
+        if not size:
+            return 0
+        f.seek(size - 1)
+        if f.read(1) == b"\n":
+            return size
+        end = size
+        while end > 0:
+            start = max(0, end - 4096)
+            f.seek(start)
+            i = f.read(end - start).rfind(b"\n")
+            if i >= 0:
+                end = start + i + 1
+                break
+            end = start
+        f.truncate(end)
+        self.journal_offset = min(self.journal_offset, end)
+        printc(f"日志末尾有 {size - end} 字节未写完的记录，已截去", "yellow")
+        return end
+
+    # 压缩：原子地重写快照并删除日志；删除前中断时，留下的旧日志因快照标识不符不会被回放
+    @timed("storage.compact")
+    def compact(self, tasks):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if SNAPSHOT_FORMAT == "binary":
+            data = encode_snapshot([t.to_row() for t in tasks])
+        elif SNAPSHOT_FORMAT == "pretty":
+            data = json.dumps([t.to_record() for t in tasks], ensure_ascii=False, indent=2).encode("utf-8")
+        else:
+            data = encode_json([t.to_record() for t in tasks])
+        atomic_write(self.path, lambda f: f.write(data), binary=True)
+        self.base = snapshot_id(data)
+        self.journal.unlink(missing_ok=True)
+        self.snapshot_sig = file_signature(self.path)
+        self.journal_records = 0
+        self.journal_offset = 0
+        self.needs_compact = False
+
+
+class SqliteStorage:
+    """SQLite数据库（~/.todo.db）：每次修改只写入对应的行；查询仍在内存中进行，加载时读取全部任务"""
+    name = "sqlite"
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS tasks (
+            id INTEGER PRIMARY KEY,
+            content TEXT NOT NULL,
+            priority TEXT NOT NULL CHECK (priority IN ('high', 'normal', 'low')),
+            status TEXT NOT NULL CHECK (status IN ('pending', 'done')),
+            created INTEGER NOT NULL,
+            modified INTEGER NOT NULL,
+            due_date INTEGER
+        );
+    """
+
+    def __init__(self, path=None):
+        self.path = Path(path) if path else db_file()
+        self._conn = None
+        # 连接由后台加载线程创建、主线程继续使用，同一时刻只允许一个线程使用连接
+        self._conn_lock = threading.RLock()
+        self.data_version = None
+
+    @contextmanager
+    def lock(self):
+        """BEGIN IMMEDIATE：在同步外部修改之前就取得写锁"""
+        with self._conn_lock:
+            conn = self.conn
+            conn.execute("BEGIN IMMEDIATE")
             try:
-                datetime.strptime(task["due_date"], DATE_FORMAT)
-            except ValueError:
-                raise ValueError(f"截止日期格式错误: {task['due_date']}（应为{DATE_FORMAT}）")
-        
-        if not isinstance(task["id"], int) or task["id"] <= 0:
-            raise ValueError(f"无效ID: {task['id']}")
-        if task["priority"] not in VALID_PRIS:
-            raise ValueError(f"无效优先级: {task['priority']}")
-        if task["status"] not in ["pending", "done"]:
-            raise ValueError(f"无效状态: {task['status']}")
-
-    # 重置数据文件（保持不变）
-    def _reset_data(self):
+                yield
+            except BaseException:
+                if conn.in_transaction:
+                    conn.rollback()
+                raise
+            else:
+                if conn.in_transaction:
+                    conn.commit()
+
+    def changed(self):
+        """其他连接提交过修改时PRAGMA data_version会变化"""
+        return "reload" if self._data_version() != self.data_version else None
+
+    def _data_version(self):
+        # fetchall读完结果，避免未结束的语句一直持有共享锁
+        with self._conn_lock:
+            return self.conn.execute("PRAGMA data_version").fetchall()[0][0]
+
+    @property
+    def conn(self):
+        with self._conn_lock:
+            if self._conn is None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                # 跨线程使用由_conn_lock串行化
+                self._conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+                self._conn.execute("PRAGMA journal_mode=WAL")  # 读不阻塞写
+                self._conn.executescript(self.SCHEMA)
+            return self._conn
+
+    def exists(self):
+        return self.path.exists()
+
+    def signature(self):
+        return None  # 搜索索引不落盘，加载时在内存中重建
+
+    @timed("storage.load_snapshot")
+    def load_snapshot(self):
+        with self._conn_lock:
+            self.data_version = self._data_version()
+            rows = self.conn.execute(
+                "SELECT id, content, priority, status, created, modified, due_date FROM tasks ORDER BY id")
+            return [Task(i, content, VALID_PRIS[PRI_RANK[pri]], VALID_STATUS[VALID_STATUS.index(status)],
+                         created, modified, due)
+                    for i, content, pri, status, created, modified, due in rows]
+
+    def load_ops(self):
+        return iter(())
+
+    @timed("storage.commit")
+    def commit(self, ops, tasks):
+        with self._conn_lock, self.conn:  # 在lock()中时，此处提交的同时释放写锁
+            for op, task, task_id in ops:
+                if op == "put":
+                    self.conn.execute(
+                        "INSERT OR REPLACE INTO tasks VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (task.id, task.content, task.priority, task.status, task.created, task.modified, task.due_date))
+                elif op == "del":
+                    self.conn.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
+                else:
+                    self.conn.execute("DELETE FROM tasks")
+        return False
+
+
+def create_storage():
+    if STORAGE_BACKEND == "sqlite":
+        return SqliteStorage()
+    if STORAGE_BACKEND != "json":
+        raise ValueError(f"未知存储后端: {STORAGE_BACKEND}（可选 json/sqlite）")
+    return JsonStorage()
+
+def migrate_to_sqlite(json_path=None, db_path=None):
+    """把JSON数据（快照+日志）导入SQLite数据库，JSON文件旁的备份合并到当前备份目录，返回(任务数, 备份数)"""
+    storage = JsonStorage(json_path)
+    if not storage.exists():
+        # 路径写错时不能当作0个任务"导入成功"
+        raise ValueError(f"找不到JSON数据: {storage.path}（及其日志）")
+    source = TodoManager(storage)
+    target = SqliteStorage(db_path)
+    target.commit([("put", t, None) for t in source.tasks], None)
+    backups = BackupStore().merge(BackupStore(source.storage.path.parent / "todo_backups"))
+    return len(source.tasks), backups
+
+
+# 增量备份：按ID分段、gzip压缩、以内容哈希命名的数据块，未变化的分段在各份备份间共享
+class BackupStore:
+    def __init__(self, directory=None):
+        self.dir = Path(directory) if directory else TODO_FILE.parent / "todo_backups"
+        self.chunk_dir = self.dir / "chunks"
+        self.manifest_path = self.dir / "manifest.json"
+        self._manifest = None
+
+    @property
+    def snapshots(self):
+        """备份清单（旧的在前），不需要扫描目录"""
+        if self._manifest is None:
+            try:
+                with open(self.manifest_path, "r", encoding="utf-8") as f:
+                    self._manifest = json.load(f)
+            except (OSError, ValueError):
+                self._manifest = {"version": 1, "snapshots": []}
+        return self._manifest["snapshots"]
+
+    def reload(self):
+        """丢弃缓存的清单：其他进程可能也写过备份，按编号操作之前重新读取"""
+        self._manifest = None
+
+    @timed("backup.snapshot")
+    def maybe_snapshot(self, tasks, force=False):
+        """距上次备份不足BACKUP_INTERVAL秒时跳过（force=True除外）"""
+        snapshots = self.snapshots
+        if not force and snapshots and time.time() - snapshots[-1]["time"] < BACKUP_INTERVAL:
+            return None
+        self.reload()
+        snapshots = self.snapshots
+        buckets = {}
+        for t in tasks:
+            buckets.setdefault(t.id // BACKUP_CHUNK_SIZE, []).append(t)
+        self.chunk_dir.mkdir(parents=True, exist_ok=True)
+        chunks = []
+        for b in sorted(buckets):
+            data = "".join(json.dumps(t.to_record(), ensure_ascii=False) + "\n"
+                           for t in sorted(buckets[b], key=lambda t: t.id)).encode("utf-8")
+            digest = hashlib.sha1(data).hexdigest()
+            path = self.chunk_dir / f"{digest}.gz"
+            if not path.exists():
+                tmp = path.with_suffix(".tmp")
+                tmp.write_bytes(gzip.compress(data, mtime=0))
+                os.replace(tmp, path)
+            chunks.append(digest)
+        now = datetime.now()
+        entry = {"name": now.strftime("%Y%m%d%H%M%S%f"), "time": now.timestamp(),
+                 "count": sum(len(v) for v in buckets.values()), "chunks": chunks}
+        snapshots.append(entry)
+        self._prune()
+        self._write_manifest()
+        return entry
+
+    # 按清单保留最近MAX_BACKUPS份，删除不再被引用的数据块
+    def _prune(self):
+        snapshots = self.snapshots
+        removed = snapshots[:-MAX_BACKUPS]
+        if not removed:
+            return
+        del snapshots[:-MAX_BACKUPS]
+        referenced = {c for e in snapshots for c in e["chunks"]}
+        for e in removed:
+            for c in e["chunks"]:
+                if c not in referenced:
+                    (self.chunk_dir / f"{c}.gz").unlink(missing_ok=True)
+
+    def _write_manifest(self):
+        tmp = self.manifest_path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._manifest, f, ensure_ascii=False)
+        os.replace(tmp, self.manifest_path)
+
+    def merge(self, other):
+        """把另一个备份目录中的备份并入清单（数据块按哈希去重），返回新增的份数；同一目录返回0"""
+        if other.dir.resolve() == self.dir.resolve():
+            return 0
+        self._manifest = None
+        known = {e["name"] for e in self.snapshots}
+        new = [e for e in other.snapshots if e["name"] not in known]
+        if not new:
+            return 0
+        self.chunk_dir.mkdir(parents=True, exist_ok=True)
+        for e in new:
+            for c in e["chunks"]:
+                path = self.chunk_dir / f"{c}.gz"
+                if not path.exists():
+                    tmp = path.with_suffix(".tmp")
+                    copyfile(other.chunk_dir / f"{c}.gz", tmp)
+                    os.replace(tmp, path)
+        self.snapshots.extend(new)
+        self.snapshots.sort(key=lambda e: e["time"])
+        self._prune()
+        self._write_manifest()
+        names = {e["name"] for e in new}
+        return sum(e["name"] in names for e in self.snapshots)  # 比保留份数更旧的不计
+
+    def load(self, n):
+        """读取倒数第n份备份（1为最新）中的任务"""
+        entry = self.snapshots[-n]
+        tasks = []
+        for c in entry["chunks"]:
+            data = gzip.decompress((self.chunk_dir / f"{c}.gz").read_bytes()).decode("utf-8")
+            tasks.extend(Task.from_record(json.loads(line)) for line in data.splitlines())
+        return tasks
+
+
+# 归档：完成已久的任务按完成月份追加到 todo_archive/YYYY-MM.jsonl[.gz]，统计数据另存聚合结果
+class ArchiveStore:
+    VERSION = 1
+
+    def __init__(self, directory=None):
+        self.dir = Path(directory) if directory else TODO_FILE.parent / "todo_archive"
+        self.stats_path = self.dir / "stats.json"
+        self._stats = None
+        self._stats_sig = None
+        self._max_id = 0
+
+    def _refresh(self):
+        """读取聚合文件；其他进程归档后文件签名变化，自动重新读取"""
+        sig = file_signature(self.stats_path)
+        if self._stats is not None and sig == self._stats_sig:
+            return
+        stats, max_id = TaskStats(), 0
         try:
-            with open(TODO_FILE, "w", encoding="utf-8") as f:
-                json.dump([], f, ensure_ascii=False, indent=2)
-        except Exception:
+            with open(self.stats_path, "rb") as f:
+                data = decode_json(f.read())
+            if data.get("version") == self.VERSION:
+                stats.total = stats.done = data["total"]
+                stats.priority.update(data["priority"])
+                stats.created_by_day.update({int(d): n for d, n in data["created_by_day"].items()})
+                stats.completed_by_day.update({int(d): n for d, n in data["completed_by_day"].items()})
+                max_id = data["max_id"]
+        except FileNotFoundError:
             pass
+        except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+            printc(f"归档统计读取失败: {e}", "yellow")
+            stats = TaskStats()
+        self._stats, self._max_id, self._stats_sig = stats, max_id, sig
+
+    @property
+    def stats(self):
+        """归档任务的聚合统计（TaskStats）"""
+        self._refresh()
+        return self._stats
+
+    @property
+    def max_id(self):
+        """归档中最大的任务ID，新任务ID不与之重复"""
+        self._refresh()
+        return self._max_id
+
+    def segments(self):
+        """全部分段文件（按月份排序）"""
+        if not self.dir.exists():
+            return []
+        return sorted(p for p in self.dir.iterdir() if p.name.endswith((".jsonl", ".jsonl.gz")))
+
+    def append(self, tasks):
+        """追加归档任务并更新聚合统计；先写归档再由调用方从主数据删除，中断时不会丢失任务"""
+        self.dir.mkdir(parents=True, exist_ok=True)
+        by_month = {}
+        for t in tasks:
+            by_month.setdefault(from_minutes(t.modified)[:7], []).append(t)
+        for month, group in sorted(by_month.items()):
+            data = "".join(json.dumps(t.to_record(), ensure_ascii=False) + "\n" for t in group).encode("utf-8")
+            name = f"{month}.jsonl.gz" if ARCHIVE_COMPRESS else f"{month}.jsonl"
+            # gzip允许多个压缩成员首尾相接，追加写入后仍可整体解压
+            with open(self.dir / name, "ab") as f:
+                f.write(gzip.compress(data) if ARCHIVE_COMPRESS else data)
+
+        stats = self.stats
+        for t in tasks:
+            stats.add(t)
+        self._max_id = max(self._max_id, max(t.id for t in tasks))
+        data = {"version": self.VERSION, "total": stats.total, "max_id": self._max_id,
+                "priority": dict(stats.priority),
+                "created_by_day": {str(d): n for d, n in stats.created_by_day.items() if n},
+                "completed_by_day": {str(d): n for d, n in stats.completed_by_day.items() if n}}
+        payload = encode_json(data)
+        atomic_write(self.stats_path, lambda f: f.write(payload), binary=True)
+        self._stats_sig = file_signature(self.stats_path)
+
+    def iter_tasks(self):
+        """按月份顺序逐条读取归档任务，损坏的行跳过"""
+        for path in self.segments():
+            opener = gzip.open if path.suffix == ".gz" else open
+            try:
+                with opener(path, "rt", encoding="utf-8") as f:
+                    for line in f:
+                        try:
+                            yield Task.from_record(json.loads(line))
+                        except ValueError:
+                            continue
+            except (OSError, EOFError) as e:
+                printc(f"归档文件 {path.name} 读取失败: {e}", "yellow")
 
-    # 查找任务（保持不变）
+
+def requires_load(method):
+    """后台加载完成前调用的方法会先等待加载结束"""
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        self._ready.wait()
+        return method(self, *args, **kwargs)
+    return wrapper
+
+
+class TodoManager:
+    def __init__(self, storage=None, background=False):
+        self.storage = storage or create_storage()
+        self.backups = BackupStore()
+        self.archive = ArchiveStore()
+        self._lock_depth = 0
+        self._batch_depth = 0
+        self._reminder = None
+        self._ready = threading.Event()
+        if background:
+            # 后台线程加载，调用方可以立即显示提示符
+            threading.Thread(target=self.reload, daemon=True).start()
+        else:
+            self.reload()
+
+    def reload(self):
+        """从存储重新加载全部任务，并重建各类索引"""
+        self._ready.clear()
+        try:
+            for _ in range(RELOAD_RETRIES):
+                self._pending_ops = []  # 尚未写入存储的修改记录
+                self._search = SearchIndex()
+                self._stats = TaskStats()
+                self._reminders = ReminderQueue()
+                self._tasks = self._load()  # id -> 任务，dict保持插入顺序
+                # 不持锁加载时其他进程可能正好压缩（快照已替换、日志已删除），读到的是新旧混合的数据，重新加载
+                if self._load_failed or self.storage.changed() != "reload":
+                    break
+            # 归档任务的ID也不复用
+            self.next_id = max(max(self._tasks, default=0), self.archive.max_id) + 1
+        finally:
+            self._ready.set()
+
+    def wait_loaded(self, timeout=None):
+        """等待加载完成，返回是否已加载"""
+        return self._ready.wait(timeout)
+
+    @property
+    @requires_load
+    def tasks(self):
+        """按添加顺序排列的任务视图（只读，修改请通过add/edit/done/remove）"""
+        return self._tasks.values()
+
+    # 加载任务：先读快照，再回放日志中的修改记录
+    @timed("manager.load")
+    def _load(self):
+        self._load_failed = False
+        if not self.storage.exists():
+            return {}
+        try:
+            data = self.storage.load_snapshot()
+            self._search.load_or_build(data, self.storage.signature())
+            self._stats.build(data)
+            self._reminders.build(data)
+            tasks = {t.id: t for t in data}
+            for op, task, task_id in self.storage.load_ops():
+                self._apply(tasks, op, task, task_id)
+            return tasks
+        except (OSError, ValueError, sqlite3.DatabaseError) as e:
+            printc(f"数据错误: {e}", "red")
+        except Exception as e:
+            # 意外错误也要返回空任务表，否则后台加载线程退出后_tasks不存在，之后的每条命令都会失败
+            printc(f"加载失败: {type(e).__name__}: {e}", "red")
+        # 空任务表不代表存储中的数据：下次同步时重新加载，成功之前不保存（压缩会用空表覆盖原数据）
+        self._load_failed = True
+        self._search.clear()
+        self._stats.clear()
+        self._reminders.clear()
+        return {}
+
+    # 并发访问：写入时持有进程间锁，并先合并其他进程的修改；只读命令前无锁刷新
+    @contextmanager
+    def _locked(self):
+        if self._lock_depth:
+            yield
+            return
+        with self.storage.lock():
+            self._lock_depth += 1
+            try:
+                self._sync()
+                yield
+            finally:
+                self._lock_depth -= 1
+
+    @timed("manager.sync")
+    def _sync(self):
+        change = "reload" if self._load_failed else self.storage.changed()
+        if change == "reload":
+            self.reload()
+        elif change == "append":
+            next_id = self.next_id
+            for op, task, task_id in self.storage.load_ops():
+                self._apply(self._tasks, op, task, task_id)
+                if op == "put":
+                    next_id = max(next_id, task.id + 1)
+            self.next_id = next_id
+
+    @requires_load
+    def refresh(self):
+        """合并其他进程的修改（不加锁）"""
+        self._sync()
+
+    # 回放一条修改记录
+    def _apply(self, tasks, op, task, task_id):
+        if op == "put":
+            if task.id in tasks:
+                self._untrack(tasks[task.id])
+            tasks[task.id] = task
+            self._track(task)
+        elif op == "del":
+            if task_id in tasks:
+                self._untrack(tasks.pop(task_id))
+        else:
+            tasks.clear()
+            self._search.clear()
+            self._stats.clear()
+            self._reminders.clear()
+
+    # 验证JSON记录并转换为Task（时间字段转为内部的分钟数表示）
+    @staticmethod
+    def _validate(record):
+        return Task.from_record(record)
+
+    # 索引维护：任务加入/移出各类索引，修改任务前后成对调用
+    def _track(self, task):
+        self._search.add(task.id, task.content)
+        self._stats.add(task)
+        self._reminders.add(task)
+
+    def _untrack(self, task):
+        self._search.remove(task.id, task.content)
+        self._stats.remove(task)
+        self._reminders.remove(task)
+
+    # 查找任务（按ID哈希索引，O(1)）
     def _find(self, task_id):
-        return next((t for t in self.tasks if t["id"] == task_id), None)
+        return self._tasks.get(task_id)
+
+    # 记录一次修改，等待_save()写入存储
+    def _log(self, op, task=None, task_id=None):
+        self._pending_ops.append((op, task, task_id))
+
+    @contextmanager
+    def batch(self):
+        """批量修改：期间的所有修改在结束时只保存一次（可嵌套）"""
+        self._ready.wait()
+        with self._locked():
+            self._batch_depth += 1
+            try:
+                yield self
+            finally:
+                self._batch_depth -= 1
+                if not self._batch_depth and self._pending_ops:
+                    self._save()
 
-    # 保存任务（保持不变）
+    # 保存任务：把待写入的修改交给存储后端（批量模式下推迟到批量结束）
+    @timed("manager.save")
     def _save(self):
-        try:
-            self._backup()
-            TODO_FILE.parent.mkdir(parents=True, exist_ok=True)
-            with open(TODO_FILE, "w", encoding="utf-8") as f:
-                json.dump(self.tasks, f, ensure_ascii=False, indent=2)
+        if self._batch_depth:
             return True
+        if self._load_failed:
+            printc("保存失败: 数据未能加载，为避免覆盖原有数据，本次修改未保存", "red")
+            return False
+        try:
+            if self.storage.commit(self._pending_ops, self.tasks):
+                self._search.save(self.storage.signature())
+            self._pending_ops.clear()
         except Exception as e:
             printc(f"保存失败: {e}", "red")
             return False
+        self._backup()
+        return True
 
-    # 备份相关（保持不变）
-    def _backup(self):
-        if not TODO_FILE.exists():
-            return
-        backup_dir = TODO_FILE.parent / "todo_backups"
-        backup_dir.mkdir(exist_ok=True)
+    # 备份相关（按BACKUP_INTERVAL限频，失败只警告不影响保存）
+    @timed("manager.backup")
+    def _backup(self, force=False):
         try:
-            backup_path = backup_dir / f"todo_{datetime.now().strftime('%Y%m%d%H%M%S')}.bak"
-            copyfile(TODO_FILE, backup_path)
-            # 清理旧备份
-            backups = sorted(backup_dir.glob("todo_*.bak"), 
-                           key=lambda f: f.stem.split("_")[1], reverse=True)
-            for f in backups[MAX_BACKUPS:]:
-                f.unlink(missing_ok=True)
-        except Exception as e:
+            self.backups.maybe_snapshot(self.tasks, force)
+        except (OSError, ValueError) as e:
             printc(f"备份警告: {e}", "yellow")
 
+    @requires_load
+    def restore(self, n):
+        """恢复倒数第n份备份（1为最新）；恢复前先备份当前数据，可再次恢复回来"""
+        with self._locked():
+            self.backups.reload()  # 编号要与用户刚看到的列表（含其他进程的备份）一致
+            count = len(self.backups.snapshots)
+            if count == 0:
+                raise ValueError("暂无备份")
+            if not 1 <= n <= count:
+                raise ValueError(f"备份编号应在 1-{count} 之间")
+            tasks = self.backups.load(n)
+            self._backup(force=True)
+            self._tasks.clear()
+            self._search.clear()
+            self._stats.clear()
+            self._reminders.clear()
+            self._log("clear")
+            for t in tasks:
+                self._tasks[t.id] = t
+                self._track(t)
+                self._log("put", t)
+            self.next_id = max(self.next_id, max(self._tasks, default=0) + 1)
+            return self._save()
+
     # 核心功能（新增截止日期支持）
+    @requires_load
     def add(self, content, priority="normal", due_date=None):
         content = content.strip()
         if not content or len(content) > MAX_CONTENT_LEN:
@@ -205,69 +1743,128 @@ class TodoManager:
             raise ValueError(f"优先级必须是: {', '.join(VALID_PRIS)}")
         
         # 使用新的日期解析函数
-        parsed_due = parse_due_date(due_date) if due_date else None
+        parsed_due = parse_due_minutes(due_date) if due_date else None
         
-        now = datetime.now().strftime(DATE_FORMAT)
-        task = {
-            "id": self.next_id, 
-            "content": content, 
-            "priority": priority,
-            "status": "pending", 
-            "created": now, 
-            "modified": now,
-            "due_date": parsed_due
-        }
-        self.tasks.append(task)
-        if self._save():
-            self.next_id += 1
-            return task["id"]
-        raise IOError("添加失败")
+        with self._locked():
+            now = now_minutes()
+            task = Task(self.next_id, content, priority, "pending", now, now, parsed_due)
+            self._tasks[task.id] = task
+            self._track(task)
+            self._log("put", task)
+            if self._save():
+                self.next_id += 1
+                return task.id
+            raise IOError("添加失败")
 
+    @requires_load
+    def import_record(self, record):
+        """导入一条外部记录：重新分配ID，缺少的字段按新任务补全，校验后加入"""
+        if not isinstance(record, dict):
+            raise ValueError("记录必须是JSON对象")
+        content = str(record.get("content") or "").strip()
+        if not content or len(content) > MAX_CONTENT_LEN:
+            raise ValueError(f"内容不能为空且长度≤{MAX_CONTENT_LEN}")
+        due = record.get("due_date", record.get("due"))
+        now = from_minutes(now_minutes())
+        
+        with self._locked():
+            task = self._validate({
+                "id": self.next_id,
+                "content": content,
+                "priority": record.get("priority") or "normal",
+                "status": record.get("status") or "pending",
+                "created": record.get("created") or now,
+                "modified": record.get("modified") or now,
+                "due_date": parse_due_date(str(due)) if due else None
+            })
+            self._tasks[task.id] = task
+            self._track(task)
+            self._log("put", task)
+            if self._save():
+                self.next_id += 1
+                return task.id
+            raise IOError("导入失败")
+
+    @requires_load
+    def export_records(self, status=None, priority=None, due_from=None, due_to=None, query=None):
+        """按条件逐条产出任务记录（due_from/due_to为分钟数，闭区间；指定时排除无截止日期的任务）"""
+        check_due = due_from is not None or due_to is not None
+        for t in self.select(query) if query else self.tasks:
+            if status and t.status != status:
+                continue
+            if priority and t.priority != priority:
+                continue
+            if check_due and (t.due_date is None
+                              or (due_from is not None and t.due_date < due_from)
+                              or (due_to is not None and t.due_date > due_to)):
+                continue
+            yield t.to_record()
+
+    @requires_load
     def edit(self, task_id, new_content=None, new_pri=None, new_due=None):
         self._check_id(task_id)
-        task = self._find(task_id) or self._invalid_id(task_id)
         
-        modified = False
+        changes = {}
         if new_content is not None:
             new_content = new_content.strip()
             if not new_content or len(new_content) > MAX_CONTENT_LEN:
                 raise ValueError(f"内容不能为空且长度≤{MAX_CONTENT_LEN}")
-            task["content"] = new_content
-            modified = True
+            changes["content"] = new_content
         if new_pri and new_pri in VALID_PRIS:
-            task["priority"] = new_pri
-            modified = True
+            changes["priority"] = new_pri
         # 处理截止日期编辑（使用新的解析函数）
         if new_due is not None:
-            task["due_date"] = parse_due_date(new_due)
-            modified = True
+            changes["due_date"] = parse_due_minutes(new_due)
         
-        if modified:
-            task["modified"] = datetime.now().strftime(DATE_FORMAT)
-            return self._save()
-        return False
+        with self._locked():
+            task = self._find(task_id) or self._invalid_id(task_id)
+            if changes:
+                self._untrack(task)
+                for key, value in changes.items():
+                    setattr(task, key, value)
+                task.modified = now_minutes()
+                self._track(task)
+                self._log("put", task)
+                return self._save()
+            return False
 
     # 新增：数据统计功能（扩展时间维度）
-    def get_stats(self):
-        total = len(self.tasks)
+    @requires_load
+    def get_stats(self, query=None):
+        """统计全部任务（含归档的聚合数据）；给出过滤表达式时只统计未归档中匹配的任务"""
+        stats = self._stats
+        archived = 0
+        if query:
+            stats = TaskStats()
+            stats.build(self.select(query))
+        elif self.archive.stats.total:
+            hot, old = stats, self.archive.stats
+            stats = TaskStats()
+            stats.total, stats.done = hot.total + old.total, hot.done + old.done
+            stats.priority = hot.priority + old.priority
+            stats.created_by_day = hot.created_by_day + old.created_by_day
+            stats.completed_by_day = hot.completed_by_day + old.completed_by_day
+            stats.pending_due = hot.pending_due  # 归档任务都已完成，不影响过期数
+            archived = old.total
+        total = stats.total
         if total == 0:
             return {"total": 0}
-        done = sum(1 for t in self.tasks if t["status"] == "done")
+        done = stats.done
         pending = total - done
         # 优先级分布
-        pri_counts = {pri: sum(1 for t in self.tasks if t["priority"] == pri) for pri in VALID_PRIS}
+        pri_counts = {pri: stats.priority[pri] for pri in VALID_PRIS}
         # 过期任务数
-        overdue = sum(1 for t in self.tasks if t["status"] == "pending" and is_overdue(t.get("due_date")))
+        overdue = stats.overdue(now_minutes())
         
-        # 新增时间维度统计
-        today = datetime.now().strftime("%Y-%m-%d")
-        created_today = sum(1 for t in self.tasks if t["created"].startswith(today))
-        completed_today = sum(1 for t in self.tasks if t["status"] == "done" and t["modified"].startswith(today))
+        # 新增时间维度统计（按天聚合，今日及最近8天直接查表）
+        today = date.today().toordinal()
+        created_today = stats.created_by_day[today]
+        completed_today = stats.completed_by_day[today]
         
         # 本周统计
-        week_ago = (datetime.now() - timedelta(days=7)).strftime("%Y-%m-%d")
-        created_this_week = sum(1 for t in self.tasks if t["created"] >= week_ago)
-        completed_this_week = sum(1 for t in self.tasks if t["status"] == "done" and t["modified"] >= week_ago)
+        week = range(today - 7, today + 1)
+        created_this_week = sum(stats.created_by_day[d] for d in week)
+        completed_this_week = sum(stats.completed_by_day[d] for d in week)
         
         return {
             "total": total,
@@ -278,53 +1875,414 @@ class TodoManager:
             "created_today": created_today,
             "completed_today": completed_today,
             "created_this_week": created_this_week,
-            "completed_this_week": completed_this_week
+            "completed_this_week": completed_this_week,
+            "archived": archived
         }
 
+    @requires_load
+    def due_reminders(self):
+        """取出已到提醒时间的 (事件, 任务)：事件为soon（即将到期）或due（已到期）"""
+        fired = self._reminders.pop_ready(now_minutes())
+        return [(kind, self._tasks[task_id]) for kind, task_id in fired if task_id in self._tasks]
+
+    @requires_load
+    def next_reminder(self):
+        return self._reminders.next_time()
+
+    def start_reminder(self, prompt=""):
+        """启动提醒线程（每个管理器只启动一个）"""
+        if self._reminder is None:
+            self._reminder = Reminder(self, prompt)
+            self._reminder.start()
+
+    @requires_load
+    def overdue_count(self):
+        """已过期的待办任务数（二分查找，不逐个解析日期）"""
+        return self._stats.overdue(now_minutes())
+
     # 以下方法保持原有逻辑，仅适配截止日期字段
+    @requires_load
     def done(self, task_id):
         self._check_id(task_id)
-        task = self._find(task_id) or self._invalid_id(task_id, pending_only=True)
-        if task["status"] == "done":
-            raise ValueError(f"任务 {task_id} 已完成")
-        task["status"] = "done"
-        task["modified"] = datetime.now().strftime(DATE_FORMAT)
-        return self._save()
+        with self._locked():
+            task = self._find(task_id) or self._invalid_id(task_id, pending_only=True)
+            if task.status == "done":
+                raise ValueError(f"任务 {task_id} 已完成")
+            self._untrack(task)
+            task.status = "done"
+            task.modified = now_minutes()
+            self._track(task)
+            self._log("put", task)
+            return self._save()
 
+    @requires_load
     def remove(self, task_id):
         self._check_id(task_id)
-        if not self._find(task_id):
-            self._invalid_id(task_id)
-        self.tasks = [t for t in self.tasks if t["id"] != task_id]
-        return self._save()
+        with self._locked():
+            if not self._find(task_id):
+                self._invalid_id(task_id)
+            self._untrack(self._tasks.pop(task_id))
+            self._log("del", task_id=task_id)
+            return self._save()
 
+    @requires_load
     def clear(self):
-        if not self.tasks:
-            raise ValueError("列表已空")
-        self.tasks.clear()
-        return self._save()
+        with self._locked():
+            if not self.tasks:
+                raise ValueError("列表已空")
+            self._tasks.clear()
+            self._search.clear()
+            self._stats.clear()
+            self._reminders.clear()
+            self._log("clear")
+            return self._save()
 
-    def search(self, keyword):
+    @requires_load
+    def select(self, query):
+        """按过滤表达式（字符串或Query）筛选任务，按ID顺序返回；有文本/ID条件时先用索引缩小候选集"""
+        if not isinstance(query, Query):
+            query = Query(query)
+        candidates = None
+        for kind, value in query.index_terms:
+            if kind == "text":
+                ids = self._search.candidates(value)
+            elif value.stop - value.start <= len(self._tasks):  # 范围可达sys.maxsize，len(range)会溢出
+                ids = {i for i in value if i in self._tasks}
+            else:
+                ids = {i for i in self._tasks if i in value}
+            candidates = ids if candidates is None else candidates & ids
+        if candidates is None:
+            return [t for t in self.tasks if query.match(t)]
+        # ID单调递增，按ID排序即为添加顺序
+        return [t for t in map(self._tasks.__getitem__, sorted(candidates)) if query.match(t)]
+
+    @requires_load
+    def done_matching(self, query):
+        """把符合过滤表达式的待办任务全部标记完成（整批只保存一次），返回数量"""
+        with self.batch():
+            tasks = [t for t in self.select(query) if t.status == "pending"]
+            if not tasks:
+                raise ValueError("没有符合条件的待办任务")
+            for t in tasks:
+                self.done(t.id)
+        return len(tasks)
+
+    @requires_load
+    def remove_matching(self, query):
+        """删除符合过滤表达式的全部任务（整批只保存一次），返回数量"""
+        with self.batch():
+            tasks = self.select(query)
+            if not tasks:
+                raise ValueError("没有符合条件的任务")
+            for t in tasks:
+                self.remove(t.id)
+        return len(tasks)
+
+    @requires_load
+    def list_tasks(self, by_due=False, status=None, priority=None, limit=None, page=None, query=None):
+        """筛选并排序任务，返回 (本页任务, 符合条件的总数)；limit为None时返回全部"""
+        if page is not None and limit is None:
+            limit = LIST_PAGE_SIZE
+        if (limit is not None and limit <= 0) or (page is not None and page <= 0):
+            raise ValueError("--limit 和 --page 必须是正整数")
+        
+        if by_due:
+            # 按截止日期排序（无截止日期的放最后）
+            key = lambda t: (
+                t.status != "pending",  # 待办在前
+                t.due_date is None,  # 有截止日期的在前
+                t.due_date or 0  # 按日期升序（分钟数）
+            )
+        else:
+            # 原有排序逻辑（待办在前，按优先级）
+            key = lambda t: (t.status != "pending", PRI_RANK[t.priority])
+        
+        tasks = self.select(query) if query else self.tasks
+        if status or priority:
+            tasks = [t for t in tasks
+                     if (not status or t.status == status)
+                     and (not priority or t.priority == priority)]
+        total = len(tasks)
+        if limit is None or total == 0:
+            return sorted(tasks, key=key), total
+        # 只需要前 page*limit 条时用堆取Top-K，不必对全部任务排序（结果与sorted一致）
+        start = ((page or 1) - 1) * limit
+        if start >= total:
+            raise ValueError(f"页码超出范围，共 {(total + limit - 1) // limit} 页")
+        return heapq.nsmallest(start + limit, tasks, key=key)[start:], total
+
+    @requires_load
+    def archive_done(self, days=ARCHIVE_AFTER_DAYS):
+        """把完成超过days天（按整天计）的任务移入归档，返回归档数量"""
+        cutoff = now_minutes() // 1440 - days
+        # 先查按完成日期的聚合，没有足够旧的已完成任务时不扫描全部任务
+        if not any(n and day < cutoff for day, n in self._stats.completed_by_day.items()):
+            return 0
+        with self.batch():
+            old = [t for t in self.tasks if t.status == "done" and t.modified // 1440 < cutoff]
+            if not old:
+                return 0
+            self.archive.append(old)
+            for t in old:
+                self._untrack(self._tasks.pop(t.id))
+                self._log("del", task_id=t.id)
+        return len(old)
+
+    @requires_load
+    def search(self, keyword, mode="phrase", include_archive=False):
+        """搜索任务：phrase按整句子串匹配（默认），all/any按空格拆分后全部/任一匹配；include_archive时一并搜索归档"""
         if not keyword.strip():
             raise ValueError("关键词不能为空")
-        return [t for t in self.tasks if keyword.lower() in t["content"].lower()]
+        terms = [keyword] if mode == "phrase" else keyword.split()
+        if include_archive:
+            terms = [term.lower() for term in terms]
+            check = any if mode == "any" else all
+            archived = [t for t in self.archive.iter_tasks() if check(term in t.content.lower() for term in terms)]
+            return self.search(keyword, mode) + archived
+        matched = None
+        for term in terms:
+            term = term.lower()
+            ids = {i for i in self._search.candidates(term) if term in self._tasks[i].content.lower()}
+            if matched is None:
+                matched = ids
+            elif mode == "any":
+                matched |= ids
+            else:
+                matched &= ids
+        # ID单调递增，按ID排序即为添加顺序
+        return [self._tasks[i] for i in sorted(matched)]
 
     def _check_id(self, task_id):
         if not isinstance(task_id, int) or task_id <= 0:
             raise ValueError(f"ID必须是正整数")
 
     def _invalid_id(self, task_id, pending_only=False):
-        valid_ids = [t["id"] for t in self.tasks if not pending_only or t["status"] == "pending"]
-        ids_str = ", ".join(map(str, valid_ids)) if valid_ids else "无可用ID"
+        # 只列出前 MAX_HINT_IDS 个可用ID，避免大数据量时扫描全部任务
+        candidates = (t.id for t in self.tasks if not pending_only or t.status == "pending")
+        valid_ids = list(islice(candidates, MAX_HINT_IDS + 1))
+        ids_str = ", ".join(map(str, valid_ids[:MAX_HINT_IDS])) if valid_ids else "无可用ID"
+        if len(valid_ids) > MAX_HINT_IDS:
+            ids_str += " ..."
         raise ValueError(f"找不到ID {task_id}，可用{'' if not pending_only else '待完成'}ID: {ids_str}")
 
 
+# 提醒线程：睡到最近的提醒时间，到点时响铃并打印提醒，设置了TODO_REMIND_HOOK时再执行该命令
+class Reminder(threading.Thread):
+    def __init__(self, manager, prompt="", hook=REMIND_HOOK):
+        super().__init__(daemon=True)
+        self.manager = manager
+        self.prompt = prompt  # 交互模式下提醒打断了输入行，打印后补上提示符
+        self.hook = hook
+
+    def run(self):
+        self.manager.wait_loaded()
+        while True:
+            for kind, task in self.manager.due_reminders():
+                self.notify(kind, task)
+            next_time = self.manager.next_reminder()
+            delay = REMIND_POLL
+            if next_time is not None:
+                delay = min(delay, max(1, (next_time - now_minutes()) * 60 - datetime.now().second))
+            queue = self.manager._reminders
+            if queue.changed.wait(delay):
+                queue.changed.clear()
+
+    def notify(self, kind, task):
+        due = from_minutes(task.due_date)
+        label = f"将在 {due} 到期" if kind == "soon" else f"已到期（{due}）"
+        bell = "\a" if COLOR_ENABLED else ""
+        sys.stdout.write(f"{bell}\n{colorize(f'⏰ 任务 #{task.id} {label}: {task.content}', 'red')}\n{self.prompt}")
+        sys.stdout.flush()
+        if self.hook:
+            env = dict(os.environ, TODO_EVENT=kind, TODO_ID=str(task.id), TODO_CONTENT=task.content, TODO_DUE=due)
+            try:
+                subprocess.Popen(self.hook, shell=True, env=env)
+            except OSError as e:
+                printc(f"提醒命令执行失败: {e}", "yellow")
+
+
+# 本地HTTP/JSON服务：常驻一个TodoManager，窗口内的写请求合并为一次保存（组提交）
+class TodoServer:
+    REASONS = {200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found",
+               413: "Payload Too Large", 500: "Internal Server Error"}
+
+    def __init__(self, manager, flush_delay=SERVE_FLUSH_DELAY):
+        self.manager = manager
+        self.flush_delay = flush_delay
+        self._batch = None  # 尚未保存的批量修改
+        self._waiters = []  # 等待本批保存结果的写请求
+
+    async def serve(self, host=SERVE_HOST, port=SERVE_PORT, unix_path=None):
+        if unix_path:
+            if not hasattr(asyncio, "start_unix_server"):
+                raise ValueError("当前平台不支持Unix套接字")
+            server = await asyncio.start_unix_server(self._handle, path=unix_path)
+            address = unix_path
+        else:
+            server = await asyncio.start_server(self._handle, host, port)
+            address = f"http://{host}:{port}"
+        printc(f"✓ 服务已启动: {address}（Ctrl+C 停止）", "green")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self._flush()
+
+    async def _handle(self, reader, writer):
+        """处理一个连接上的请求（支持HTTP/1.1长连接）"""
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    method, target, version = line.decode("latin-1").split()
+                except ValueError:
+                    await self._respond(writer, 400, {"error": "请求行格式错误"}, False)
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                length = headers.get("content-length") or "0"
+                if not (length.isascii() and length.isdigit()):
+                    # 长度不可信时无法确定请求体在哪里结束，回复后关闭连接
+                    await self._respond(writer, 400, {"error": f"无效的Content-Length: {length}"}, False)
+                    break
+                length = int(length)
+                if length > SERVE_MAX_BODY:
+                    await self._respond(writer, 413, {"error": "请求体过大"}, False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+                status, payload = await self._dispatch(method.upper(), target, body)
+                await self._respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, writer, status, payload, keep_alive):
+        data = encode_json(payload)
+        head = (f"HTTP/1.1 {status} {self.REASONS[status]}\r\n"
+                f"Content-Type: application/json; charset=utf-8\r\n"
+                f"Content-Length: {len(data)}\r\n")
+        if not keep_alive:
+            head += "Connection: close\r\n"
+        writer.write(head.encode("latin-1") + b"\r\n" + data)
+        await writer.drain()
+
+    async def _dispatch(self, method, target, body):
+        """路由：返回 (状态码, JSON对象)；ValueError（参数或数据错误）返回400"""
+        url = urlsplit(target)
+        parts = [p for p in url.path.split("/") if p]
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        manager = self.manager
+        try:
+            data = decode_json(body) if body else {}
+            if not isinstance(data, dict):
+                raise ValueError("请求体必须是JSON对象")
+            if self._batch is None:
+                manager.refresh()  # 合并其他进程的修改；批量中的修改尚未保存时不重新加载
+            
+            if parts == ["tasks"] and method == "GET":
+                tasks, total = manager.list_tasks(
+                    query.get("sort") == "due", query.get("status"), query.get("priority"),
+                    self._int(query, "limit"), self._int(query, "page"), query.get("q"))
+                return 200, {"tasks": [t.to_record() for t in tasks], "total": total}
+            if parts == ["tasks"] and method == "POST":
+                task_id = await self._write(manager.add, self._str(data, "content") or "",
+                                            self._str(data, "priority") or "normal", self._str(data, "due"))
+                return 201, {"id": task_id}
+            if parts == ["search"] and method == "GET":
+                results = manager.search(query.get("q", ""), query.get("mode", "phrase"))
+                return 200, {"tasks": [t.to_record() for t in results]}
+            if parts == ["stats"] and method == "GET":
+                return 200, manager.get_stats(query.get("q"))
+            if len(parts) >= 2 and parts[0] == "tasks":
+                task_id = self._task_id(parts[1])
+                if len(parts) == 2 and method == "GET":
+                    task = manager._find(task_id)
+                    return (200, task.to_record()) if task else (404, {"error": f"找不到ID {task_id}"})
+                if len(parts) == 2 and method == "PATCH":
+                    changed = await self._write(manager.edit, task_id, self._str(data, "content"),
+                                                self._str(data, "priority"), self._str(data, "due"))
+                    return 200, {"changed": bool(changed)}
+                if len(parts) == 2 and method == "DELETE":
+                    await self._write(manager.remove, task_id)
+                    return 200, {"id": task_id}
+                if parts[2:] == ["done"] and method == "POST":
+                    await self._write(manager.done, task_id)
+                    return 200, {"id": task_id}
+            return 404, {"error": f"未知接口: {method} {url.path}"}
+        except ValueError as e:
+            return 400, {"error": str(e)}
+        except Exception as e:
+            return 500, {"error": f"错误: {e}"}
+
+    @staticmethod
+    def _int(query, key):
+        if key not in query:
+            return None
+        try:
+            return int(query[key])
+        except ValueError:
+            raise ValueError(f"{key} 必须是整数")
+
+    @staticmethod
+    def _str(data, key):
+        """请求体中的字符串字段，缺少或为null时返回None；其他类型是请求错误（400），不能在处理中途出错变成500"""
+        value = data.get(key)
+        if value is not None and not isinstance(value, str):
+            raise ValueError(f"{key} 必须是字符串")
+        return value
+
+    @staticmethod
+    def _task_id(text):
+        try:
+            return int(text)
+        except ValueError:
+            raise ValueError("ID必须是正整数")
+
+    async def _write(self, func, *args):
+        """在当前批量中执行修改，等到本批保存完成后再返回（保存失败时抛出IOError）"""
+        loop = asyncio.get_running_loop()
+        if self._batch is None:
+            self._batch = ExitStack()
+            self._batch.enter_context(self.manager.batch())
+            loop.call_later(self.flush_delay, self._flush)
+        result = func(*args)
+        waiter = loop.create_future()
+        self._waiters.append(waiter)
+        await waiter
+        return result
+
+    def _flush(self):
+        batch, waiters = self._batch, self._waiters
+        self._batch, self._waiters = None, []
+        if batch is None:
+            return
+        batch.close()  # 结束批量：本批所有修改一次写入存储
+        failed = bool(self.manager._pending_ops)
+        for waiter in waiters:
+            if not waiter.done():
+                if failed:
+                    waiter.set_exception(IOError("保存失败"))
+                else:
+                    waiter.set_result(None)
+
+
 # 命令处理（使用argparse改进参数解析）
 def create_add_parser():
     parser = argparse.ArgumentParser(prog="add")
     parser.add_argument("content", help="任务内容")
     parser.add_argument("--priority", choices=VALID_PRIS, default="normal", help="优先级")
-    parser.add_argument("--due", help="截止日期（支持多种格式：YYYY-MM-DD HH:MM、YYYY-MM-DD、today、tomorrow、3days等）")
+    parser.add_argument("--due", help="截止日期（支持多种格式：YYYY-MM-DD HH:MM、YYYY-MM-DD、today、tomorrow、3days、2weeks、3h、next-monday等）")
     return parser
 
 def create_edit_parser():
@@ -337,7 +2295,21 @@ def create_edit_parser():
 
 def create_list_parser():
     parser = argparse.ArgumentParser(prog="list")
+    parser.add_argument("query", nargs="*", help="过滤表达式，如 pri:high status:pending due<2026-11-01 text:报告")
     parser.add_argument("--due", action="store_true", help="按截止日期排序")
+    parser.add_argument("--limit", type=int, help="最多显示的任务数")
+    parser.add_argument("--page", type=int, help=f"页码（从1开始，每页--limit条，默认{LIST_PAGE_SIZE}）")
+    parser.add_argument("--status", choices=VALID_STATUS, help="只显示该状态的任务")
+    parser.add_argument("--priority", choices=VALID_PRIS, help="只显示该优先级的任务")
+    return parser
+
+def create_search_parser():
+    parser = argparse.ArgumentParser(prog="search")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--all", action="store_true", help="多个关键词全部匹配")
+    group.add_argument("--any", action="store_true", help="多个关键词任一匹配")
+    parser.add_argument("--archive", action="store_true", help="同时搜索已归档的任务")
+    parser.add_argument("keywords", nargs="+", help="关键词")
     return parser
 
 @cmd_handler
@@ -351,26 +2323,42 @@ def add_cmd(manager, args):
     task_id = manager.add(parsed_args.content, parsed_args.priority, parsed_args.due)
     printc(f"✓ 任务 {task_id} 添加成功", "green")
 
+def bulk_query(cmd, args):
+    """批量done/remove的过滤表达式：每个条件都必须写明字段，打错的ID或随手输入的词不会匹配一批任务"""
+    query = Query(args)
+    if query.bare_words:
+        word = query.bare_words[0]
+        raise ValueError(f"批量{cmd}需要写明字段，如 text:{word.lstrip('-')}（单个任务请用 {cmd} <任务ID>）")
+    return query
+
 @cmd_handler
 def done_cmd(manager, args):
+    if len(args) > 1 or (args and not args[0].lstrip("-").isdigit()):
+        count = manager.done_matching(bulk_query("done", args))
+        printc(f"✓ 已完成 {count} 个任务", "green")
+        return
     parser = argparse.ArgumentParser(prog="done")
     parser.add_argument("task_id", type=int, help="任务ID")
     try:
         parsed_args = parser.parse_args(args)
     except SystemExit:
-        raise ValueError("格式: done <任务ID>")
+        raise ValueError("格式: done <任务ID> 或 done <过滤表达式>")
     
     manager.done(parsed_args.task_id)
     printc(f"✓ 任务 {parsed_args.task_id} 已完成", "green")
 
 @cmd_handler
 def remove_cmd(manager, args):
+    if len(args) > 1 or (args and not args[0].lstrip("-").isdigit()):
+        count = manager.remove_matching(bulk_query("remove", args))
+        printc(f"✓ 已删除 {count} 个任务", "green")
+        return
     parser = argparse.ArgumentParser(prog="remove")
     parser.add_argument("task_id", type=int, help="任务ID")
     try:
         parsed_args = parser.parse_args(args)
     except SystemExit:
-        raise ValueError("格式: remove <任务ID>")
+        raise ValueError("格式: remove <任务ID> 或 remove <过滤表达式>")
     
     manager.remove(parsed_args.task_id)
     printc(f"✓ 任务 {parsed_args.task_id} 已删除", "green")
@@ -398,60 +2386,60 @@ def edit_cmd(manager, args):
 @cmd_handler
 def list_cmd(manager, args):
     parser = create_list_parser()
+    usage = "list可选参数: [过滤表达式] --due（按截止日期排序） --limit N --page N --status 状态 --priority 级别"
     try:
-        parsed_args = parser.parse_args(args)
+        # 取反的条件（如 -text:报告）以"-"开头，argparse会当作未知选项，一并作为过滤表达式
+        parsed_args, extra = parser.parse_known_args(args)
     except SystemExit:
-        raise ValueError("list可选参数: --due（按截止日期排序）")
-    
-    if parsed_args.due:
-        # 按截止日期排序（无截止日期的放最后）
-        tasks = sorted(
-            manager.tasks,
-            key=lambda t: (
-                t["status"] != "pending",  # 待办在前
-                t.get("due_date") is None,  # 有截止日期的在前
-                t.get("due_date") or "9999-12-31 23:59"  # 按日期升序
-            )
-        )
-    else:
-        # 原有排序逻辑（待办在前，按优先级）
-        tasks = sorted(
-            manager.tasks,
-            key=lambda t: (t["status"] != "pending", VALID_PRIS.index(t["priority"]))
-        )
+        raise ValueError(usage)
+    # 只接受写明字段的取反条件；打错的选项（如 --lmit 5）不能悄悄变成过滤条件
+    bad = [token for token in extra if token.startswith("--")] or (Query(extra).bare_words if extra else [])
+    if bad:
+        raise ValueError(f"未知参数: {bad[0]}（{usage}；取反条件需写明字段，如 -text:报告）")
     
-    if not tasks:
+    limit, page = parsed_args.limit, parsed_args.page
+    query = parsed_args.query + extra
+    tasks, total = manager.list_tasks(parsed_args.due, parsed_args.status, parsed_args.priority, limit, page, query)
+    if total == 0:
         printc("暂无任务", "yellow")
         return
-    [print_task(t) for t in tasks]
+    print_tasks(tasks)
+    if limit is not None or page is not None:
+        limit = limit or LIST_PAGE_SIZE
+        printc(f"第 {page or 1}/{(total + limit - 1) // limit} 页，共 {total} 个任务", "yellow")
 
 @cmd_handler
 def search_cmd(manager, args):
-    if not args:
-        raise ValueError("格式: search <关键词>")
-    keyword = " ".join(args)
-    results = manager.search(keyword)
+    parser = create_search_parser()
+    try:
+        parsed_args = parser.parse_args(args)
+    except SystemExit:
+        raise ValueError("格式: search [--all|--any] [--archive] <关键词>")
+    
+    keyword = " ".join(parsed_args.keywords)
+    mode = "all" if parsed_args.all else "any" if parsed_args.any else "phrase"
+    results = manager.search(keyword, mode, parsed_args.archive)
     if not results:
         printc(f"无匹配 '{keyword}' 的任务", "yellow")
         return
     printc(f"找到 {len(results)} 个匹配任务:", "green")
-    [print_task(t) for t in results]
+    print_tasks(results)
 
 # 新增：统计命令
 @cmd_handler
 def stats_cmd(manager, args):
-    if args:
-        raise ValueError("stats无参数")
-    stats = manager.get_stats()
+    stats = manager.get_stats(args or None)
     if stats["total"] == 0:
-        printc("暂无任务数据", "yellow")
+        printc("没有符合条件的任务" if args else "暂无任务数据", "yellow")
         return
     
-    printc("\n📊 任务统计:", "green")
+    printc(f"\n📊 任务统计{'（' + ' '.join(args) + '）' if args else ''}:", "green")
     print(f"总任务数: {stats['total']}")
     print(f"已完成: {stats['done']} ({stats['done']/stats['total']*100:.1f}%)")
     print(f"待完成: {stats['pending']}")
     print(f"已过期: {colorize(stats['overdue'], 'red')}")  # 过期标红
+    if stats["archived"]:
+        print(f"已归档: {stats['archived']}（计入已完成）")
     
     # 新增时间维度统计
     print(f"\n📅 时间统计:")
@@ -466,20 +2454,219 @@ def stats_cmd(manager, args):
     print()
 
 
-# 主程序（支持命令缩写和过期提醒）
-def main():
-    manager = TodoManager()
-    printc("\n🚀 Todo管理系统 v5.3", "green")
-    printc("输入 HELP 查看命令说明\n", "yellow")
+# 新增：备份恢复命令（不带参数时列出备份）
+@cmd_handler
+def restore_cmd(manager, args):
+    parser = argparse.ArgumentParser(prog="restore")
+    parser.add_argument("n", type=int, nargs="?", help="备份编号（1为最新）")
+    try:
+        parsed_args = parser.parse_args(args)
+    except SystemExit:
+        raise ValueError("格式: restore [备份编号]")
     
-    # 新增：启动时检查过期任务提醒
-    overdue_count = sum(1 for t in manager.tasks if t["status"] == "pending" and is_overdue(t.get("due_date")))
-    if overdue_count > 0:
-        printc(f"⚠️ 您有 {overdue_count} 个任务已过期！使用 'list --due' 查看", "red")
-        print()
+    if parsed_args.n is None:
+        manager.backups.reload()
+        snapshots = manager.backups.snapshots
+        if not snapshots:
+            printc("暂无备份", "yellow")
+            return
+        for n, entry in enumerate(reversed(snapshots), 1):
+            stamp = datetime.fromtimestamp(entry["time"]).strftime("%Y-%m-%d %H:%M:%S")
+            print(f"  {n}. {stamp}  {entry['count']} 个任务")
+        return
+    manager.restore(parsed_args.n)
+    printc(f"✓ 已恢复备份 {parsed_args.n}（恢复前的数据已另行备份）", "green")
+
+# 新增：导入/导出（NDJSON或CSV，逐行流式处理）
+@cmd_handler
+def import_cmd(manager, args):
+    parser = argparse.ArgumentParser(prog="import")
+    parser.add_argument("file", help="NDJSON或CSV文件，'-'为标准输入")
+    parser.add_argument("--format", choices=EXPORT_FORMATS, help="文件格式（默认按扩展名判断）")
+    try:
+        parsed_args = parser.parse_args(args)
+    except SystemExit:
+        raise ValueError("格式: import <文件|-> [--format ndjson|csv]")
+    
+    fmt = data_format(parsed_args.file, parsed_args.format)
+    if parsed_args.file == "-":
+        f = sys.stdin
+    else:
+        f = open(parsed_args.file, "r", encoding="utf-8-sig", newline="")
+    added = failed = 0
+    try:
+        rows = iter_import_rows(f, fmt)
+        while True:
+            # 分批保存：每批IMPORT_BATCH_SIZE条只写一次存储
+            chunk = list(islice(rows, IMPORT_BATCH_SIZE))
+            if not chunk:
+                break
+            with manager.batch():
+                for lineno, record in chunk:
+                    try:
+                        if isinstance(record, Exception):
+                            raise record
+                        manager.import_record(record)
+                        added += 1
+                    except ValueError as e:
+                        failed += 1
+                        printc(f"第 {lineno} 行: {e}", "red")
+    finally:
+        if f is not sys.stdin:
+            f.close()
+    printc(f"✓ 已导入 {added} 个任务" + (f"，{failed} 行失败" if failed else ""), "green")
+
+@cmd_handler
+def export_cmd(manager, args):
+    parser = argparse.ArgumentParser(prog="export")
+    parser.add_argument("file", nargs="?", default="-", help="输出文件（默认标准输出）")
+    parser.add_argument("--format", choices=EXPORT_FORMATS, help="文件格式（默认按扩展名判断）")
+    parser.add_argument("--status", choices=VALID_STATUS, help="只导出该状态的任务")
+    parser.add_argument("--priority", choices=VALID_PRIS, help="只导出该优先级的任务")
+    parser.add_argument("--due-from", help="截止日期不早于")
+    parser.add_argument("--due-to", help="截止日期不晚于")
+    parser.add_argument("--where", nargs="+", default=[], help="过滤表达式（语法同list）")
+    try:
+        parsed_args, extra = parser.parse_known_args(args)
+    except SystemExit:
+        raise ValueError("格式: export [文件] [--format ndjson|csv] [--status 状态] [--priority 级别] [--due-from 日期] [--due-to 日期] [--where 过滤表达式]")
+    if extra and not parsed_args.where:
+        raise ValueError(f"无法识别的参数: {' '.join(extra)}")
+    
+    fmt = data_format(parsed_args.file, parsed_args.format)
+    records = manager.export_records(
+        parsed_args.status, parsed_args.priority,
+        # 与过滤表达式相同：只给出日期时起点取当天00:00，终点取当天23:59
+        due_span(parsed_args.due_from)[0] if parsed_args.due_from else None,
+        due_span(parsed_args.due_to)[1] if parsed_args.due_to else None,
+        parsed_args.where + extra)
+    if parsed_args.file == "-":
+        write_export(sys.stdout, records, fmt)
+        return
+    counts = []
+    atomic_write(Path(parsed_args.file), lambda f: counts.append(write_export(f, records, fmt)))
+    printc(f"✓ 已导出 {counts[0]} 个任务到 {parsed_args.file}", "green")
+
+def auto_archive(manager):
+    """启动时按ARCHIVE_AFTER_DAYS自动归档，返回归档数量；失败只提示不中断"""
+    if not ARCHIVE_AFTER_DAYS:
+        return 0
+    try:
+        return manager.archive_done(ARCHIVE_AFTER_DAYS)
+    except OSError as e:
+        printc(f"自动归档失败: {e}", "yellow")
+        return 0
+
+# 新增：归档命令（手动归档，可指定天数）
+@cmd_handler
+def archive_cmd(manager, args):
+    parser = argparse.ArgumentParser(prog="archive")
+    parser.add_argument("days", type=int, nargs="?", default=ARCHIVE_AFTER_DAYS or 30, help="归档完成超过多少天的任务")
+    try:
+        parsed_args = parser.parse_args(args)
+    except SystemExit:
+        raise ValueError("格式: archive [天数]")
+    if parsed_args.days < 0:
+        raise ValueError("天数不能为负数")
+    
+    count = manager.archive_done(parsed_args.days)
+    if count:
+        printc(f"✓ 已归档 {count} 个完成超过 {parsed_args.days} 天的任务（{manager.archive.dir}）", "green")
+    else:
+        printc("没有需要归档的任务", "yellow")
+
+# 新增：HTTP服务模式
+@cmd_handler
+def serve_cmd(manager, args):
+    parser = argparse.ArgumentParser(prog="serve")
+    parser.add_argument("--host", default=SERVE_HOST, help=f"监听地址（默认{SERVE_HOST}）")
+    parser.add_argument("--port", type=int, default=SERVE_PORT, help=f"端口（默认{SERVE_PORT}）")
+    parser.add_argument("--unix", help="改为监听Unix套接字文件")
+    try:
+        parsed_args = parser.parse_args(args)
+    except SystemExit:
+        raise ValueError("格式: serve [--host 地址] [--port 端口] [--unix 套接字文件]")
     
-    # 命令映射（支持缩写：如a→add，l→list）
-    cmd_map = {
+    manager.wait_loaded()
+    if REMIND_ENABLED:
+        manager.start_reminder()
+    try:
+        asyncio.run(TodoServer(manager).serve(parsed_args.host, parsed_args.port, parsed_args.unix))
+    except KeyboardInterrupt:
+        printc("\n✓ 服务已停止", "green")
+
+# 新增：性能分析命令
+@cmd_handler
+def profile_cmd(manager, args):
+    action = args[0].lower() if args else "show"
+    if len(args) > 1 or action not in ("show", "on", "off", "reset"):
+        raise ValueError("格式: profile [on|off|reset]")
+    if action == "on":
+        PROFILER.enabled = True
+        printc("✓ 已开启性能统计", "green")
+    elif action == "off":
+        PROFILER.enabled = False
+        printc("✓ 已关闭性能统计", "green")
+    elif action == "reset":
+        PROFILER.reset()
+        printc("✓ 已清空性能统计", "green")
+    else:
+        if not PROFILER.enabled:
+            printc("性能统计未开启（profile on 或设置环境变量 TODO_PROFILE=1）", "yellow")
+        print(PROFILER.report())
+
+# 新增：迁移命令（JSON -> SQLite）
+@cmd_handler
+def migrate_cmd(manager, args):
+    parser = argparse.ArgumentParser(prog="migrate")
+    parser.add_argument("json_file", nargs="?", help="要导入的JSON文件（默认~/.todo.json）")
+    try:
+        parsed_args = parser.parse_args(args)
+    except SystemExit:
+        raise ValueError("格式: migrate [JSON文件]")
+    
+    count, backups = migrate_to_sqlite(parsed_args.json_file)
+    printc(f"✓ 已导入 {count} 个任务到 {db_file()}" + (f"，合并了 {backups} 份备份" if backups else ""), "green")
+    printc(f"备份目录 {BackupStore().dir} 由两种存储共用，restore 可直接恢复", "yellow")
+    if manager.storage.name == "sqlite":
+        manager.reload()
+    else:
+        printc("设置环境变量 TODO_BACKEND=sqlite 后重新启动即可使用SQLite存储", "yellow")
+
+
+# 主程序（支持命令缩写和过期提醒）
+HELP_TEXT = """
+命令列表（支持缩写）：
+  ADD(a)   <内容> [--priority 级别] [--due 日期]  添加任务
+           日期格式: YYYY-MM-DD HH:MM、YYYY-MM-DD、today、tomorrow、3days、2weeks、3h、next-monday等
+  EDIT(e)  <ID> [--priority 级别] [--due 日期|none] [内容]  修改任务
+  LIST(l)  [过滤表达式] [--due] [--limit N] [--page N] [--status 状态] [--priority 级别]
+                                    显示任务（--due按截止日期排序，--limit/--page分页）
+           过滤表达式: pri:high status:pending due<2026-11-01 text:报告 id:1-10，前加-取反
+  SEARCH(s) [--all|--any] [--archive] <关键词>
+                                    搜索任务（多个关键词时--all全部匹配，--any任一匹配，--archive包含归档）
+  DONE(d)  <ID>|<过滤表达式>         标记完成（表达式匹配的待办全部完成，条件须写明字段）
+  REMOVE(r) <ID>|<过滤表达式>       删除任务（表达式匹配的全部删除，条件须写明字段，如 text:报告）
+  CLEAR(c)                          清空所有
+  STATS(st) [过滤表达式]            查看统计数据（含时间维度）
+  IMPORT   <文件|-> [--format ndjson|csv]  批量导入（.csv为CSV，其余为NDJSON）
+  EXPORT   [文件] [--format 格式] [--status 状态] [--priority 级别] [--due-from 日期] [--due-to 日期] [--where 表达式]
+                                    导出任务（默认NDJSON输出到标准输出）
+  ARCHIVE  [天数]                   把完成超过N天的任务移入归档（默认自动进行）
+  RESTORE  [编号]                   列出备份 / 恢复第N份备份（1为最新）
+  SERVE    [--host 地址] [--port 端口] [--unix 套接字]  启动本地HTTP/JSON服务
+  PROFILE  [on|off|reset]           查看/开关各阶段耗时统计（TODO_PROFILE=1 启动时开启）
+  MIGRATE  [JSON文件]               导入JSON数据到SQLite（~/.todo.db），备份两种存储共用
+  HELP(h)                           帮助
+  EXIT                              退出
+
+非交互用法：
+  python todo_0.5.3.py <命令> [参数]     执行单条命令，如 python todo_0.5.3.py add 买牛奶 --due tomorrow
+  python todo_0.5.3.py - < 命令文件      从标准输入逐行读取命令（# 开头为注释），整批只保存一次"""
+
+# 命令映射（支持缩写：如a→add，l→list）
+def command_map():
+    return {
         "add": add_cmd, "a": add_cmd,
         "done": done_cmd, "d": done_cmd,
         "edit": edit_cmd, "e": edit_cmd,
@@ -487,9 +2674,86 @@ def main():
         "search": search_cmd, "s": search_cmd,
         "clear": clear_cmd, "c": clear_cmd,
         "remove": remove_cmd, "r": remove_cmd,
-        "stats": stats_cmd, "st": stats_cmd
+        "stats": stats_cmd, "st": stats_cmd,
+        "import": import_cmd,
+        "export": export_cmd,
+        "archive": archive_cmd,
+        "restore": restore_cmd,
+        "profile": profile_cmd,
+        "serve": serve_cmd,
+        "migrate": migrate_cmd
     }
 
+def run_script(manager, lines):
+    """逐行执行命令，整个脚本在一个批量修改中完成；返回失败的命令数"""
+    cmd_map = command_map()
+    failed = 0
+    with manager.batch():
+        for lineno, line in enumerate(lines, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            cmd, *args = line.split()
+            handler = cmd_map.get(cmd.lower())
+            if handler is None:
+                printc(f"第 {lineno} 行: 未知命令 {cmd}", "red")
+                failed += 1
+            elif not handler(manager, args):
+                failed += 1
+    return failed
+
+def show_overdue(manager):
+    overdue_count = manager.overdue_count()
+    if overdue_count > 0:
+        printc(f"⚠️ 您有 {overdue_count} 个任务已过期！使用 'list --due' 查看", "red")
+        print()
+
+def startup_archive(manager):
+    count = auto_archive(manager)
+    if count:
+        printc(f"已将 {count} 个完成超过 {ARCHIVE_AFTER_DAYS} 天的任务移入归档（search --archive 可搜索）", "yellow")
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    # 非交互模式：单条命令，或从标准输入读取命令脚本
+    if argv and argv != ["-"]:
+        cmd = argv[0].lower()
+        if cmd in ("help", "h", "-h", "--help"):
+            print(HELP_TEXT.strip())
+            return 0
+        handler = command_map().get(cmd)
+        if handler is None:
+            printc(f"未知命令，使用 {os.path.basename(sys.argv[0])} help 查看帮助", "red")
+            return 2
+        manager = TodoManager()
+        auto_archive(manager)
+        ok = handler(manager, argv[1:])
+        if PROFILER.enabled:
+            print(PROFILER.report(), file=sys.stderr)
+        return 0 if ok else 1
+    # 只在明确指定"-"时进入脚本模式：IDE控制台等环境的标准输入也不是终端，但用户仍在交互输入
+    if argv == ["-"]:
+        manager = TodoManager()
+        auto_archive(manager)
+        failed = run_script(manager, sys.stdin)
+        if PROFILER.enabled:
+            print(PROFILER.report(), file=sys.stderr)
+        return 1 if failed else 0
+    
+    manager = TodoManager(background=True)
+    printc("\n🚀 Todo管理系统 v5.3", "green")
+    printc("输入 HELP 查看命令说明\n", "yellow")
+    
+    # 启动时检查过期任务提醒；数据较多时不阻塞提示符，加载完成后的第一条命令之后再提醒
+    overdue_shown = manager.wait_loaded(STARTUP_WAIT)
+    if overdue_shown:
+        show_overdue(manager)
+        startup_archive(manager)
+    
+    if REMIND_ENABLED:
+        manager.start_reminder(prompt=">> ")
+    cmd_map = command_map()
+
     while True:
         try:
             inp = input(">> ").strip()
@@ -501,27 +2765,26 @@ def main():
                 printc("\n👋 再见！", "green")
                 break
             elif cmd == "help" or cmd == "h":  # 帮助命令缩写
-                printc(f"""
-命令列表（支持缩写）：
-  ADD(a)   <内容> [--priority 级别] [--due 日期]  添加任务
-           日期格式: YYYY-MM-DD HH:MM、YYYY-MM-DD、today、tomorrow、3days等
-  EDIT(e)  <ID> [--priority 级别] [--due 日期|none] [内容]  修改任务
-  LIST(l)  [--due]                  显示所有任务（--due按截止日期排序）
-  SEARCH(s) <关键词>                搜索任务
-  DONE(d)  <ID>                     标记完成
-  REMOVE(r) <ID>                    删除任务
-  CLEAR(c)                          清空所有
-  STATS(st)                         查看统计数据（含时间维度）
-  HELP(h)                           帮助
-  EXIT                              退出""", "yellow")
+                printc(HELP_TEXT, "yellow")
             elif cmd in cmd_map:
+                try:
+                    manager.refresh()  # 合并其他终端/定时任务写入的修改
+                except Exception as e:
+                    # 与cmd_handler一样只报告错误，不退出交互界面
+                    printc(f"同步失败: {e}", "red")
+                    continue
                 cmd_map[cmd](manager, args)
             else:
                 printc("未知命令，输入HELP查看帮助", "red")
+            if not overdue_shown and manager.wait_loaded(0):
+                overdue_shown = True
+                show_overdue(manager)
+                startup_archive(manager)
         except (KeyboardInterrupt, EOFError):
             printc("\n👋 再见！", "green")
             break
+    return 0
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())